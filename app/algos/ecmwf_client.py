@@ -1,30 +1,121 @@
+import asyncio
 import aiohttp
+from datetime import datetime, timezone
 import numpy as np
-from tenacity import retry, stop_after_attempt, wait_exponential
+from typing import Awaitable, Callable, List, Optional, Sequence, Tuple
+from tenacity import RetryError, retry, stop_after_attempt, wait_exponential
+from ..utils.http_session import create_client_session
 
 class ECMWFClient:
     BASE_URL = "https://api.open-meteo.com/v1/ecmwf"
+    MODEL_META_URL = "https://api.open-meteo.com/data/ecmwf_ifs025/static/meta.json"
+    BATCH_SIZE = 100            # Locations per multi-location request
+    MAX_CONCURRENT_BATCHES = 4
+    FORECAST_DAYS = 15          # Longest horizon Open-Meteo serves for ECMWF IFS
+
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
+        self.session = session
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Use the shared session, creating one if none was injected"""
+        if self.session is None or self.session.closed:
+            self.session = create_client_session()
+        return self.session
     
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
     async def get_wind_data(self, lat: float, lon: float):
         """Get 10m wind data from ECMWF OpenAPI"""
-        params = {
-            "latitude": lat,
-            "longitude": lon,
-            "hourly": "wind_speed_10m,wind_direction_10m",
+        params = self._build_params(lat, lon)
+
+        async with self._get_session().get(self.BASE_URL, params=params) as response:
+            data = await response.json()
+            return self._parse_response(data)
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    async def _get_wind_data_chunk(self, locations: Sequence[Tuple[float, float]],
+                                   before_request: Optional[Callable[[], Awaitable]] = None) -> List[dict]:
+        """Get wind data for several locations in one multi-location request"""
+        params = self._build_params(
+            ",".join(str(lat) for lat, _ in locations),
+            ",".join(str(lon) for _, lon in locations)
+        )
+        # Inside the retry, so every attempt is paced
+        if before_request is not None:
+            await before_request()
+
+        async with self._get_session().get(self.BASE_URL, params=params) as response:
+            if response.status != 200:
+                raise Exception(f"Open-Meteo API error: {response.status}")
+            data = await response.json()
+
+        # A single location comes back as an object, several as a list
+        if isinstance(data, dict):
+            data = [data]
+        if len(data) != len(locations):
+            raise Exception(f"Open-Meteo returned {len(data)} results for {len(locations)} locations")
+        return [self._parse_response(item) for item in data]
+
+    async def get_wind_data_batch(self, locations: Sequence[Tuple[float, float]],
+                                  batch_size: int = BATCH_SIZE,
+                                  before_request: Optional[Callable[[], Awaitable]] = None) -> List[dict]:
+        """
+        Get wind data for many locations with as few requests as possible
+
+        Args:
+            locations: (lat, lon) pairs
+            batch_size: Maximum locations per request
+            before_request: Awaited before every upstream request, retries
+                included, for example to take a rate limiter token
+
+        Returns:
+            One wind data dictionary per location, in the same order. If a
+            request still fails after its retries, its locations get
+            {"error": ...} instead and the other requests' data is kept.
+        """
+        chunks = [locations[i:i + batch_size] for i in range(0, len(locations), batch_size)]
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_BATCHES)
+
+        async def fetch(chunk):
+            async with semaphore:
+                return await self._get_wind_data_chunk(chunk, before_request)
+
+        results = await asyncio.gather(*(fetch(chunk) for chunk in chunks), return_exceptions=True)
+        wind_data = []
+        for chunk, chunk_result in zip(chunks, results):
+            if isinstance(chunk_result, RetryError):
+                chunk_result = chunk_result.last_attempt.exception()
+            if isinstance(chunk_result, BaseException):
+                wind_data.extend({"error": str(chunk_result)} for _ in chunk)
+            else:
+                wind_data.extend(chunk_result)
+        return wind_data
+
+    async def get_model_run_time(self) -> datetime:
+        """Initialisation time (UTC) of the newest ECMWF run Open-Meteo is serving"""
+        async with self._get_session().get(self.MODEL_META_URL) as response:
+            if response.status != 200:
+                raise Exception(f"Open-Meteo metadata error: {response.status}")
+            meta = await response.json(content_type=None)
+        return datetime.fromtimestamp(meta["last_run_initialisation_time"], tz=timezone.utc)
+
+    def _build_params(self, latitude, longitude) -> dict:
+        """Query parameters for one location or comma-separated location lists"""
+        return {
+            "latitude": latitude,
+            "longitude": longitude,
+            "hourly": "wind_speed_10m,wind_direction_10m,wind_gusts_10m,temperature_2m",
             "wind_speed_unit": "kn",  # Knots for kitesurfing
-            "forecast_days": 3,       # Optimal forecast window
+            "forecast_days": self.FORECAST_DAYS,
             "timezone": "auto"
         }
 
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.BASE_URL, params=params) as response:
-                data = await response.json()
-                return self._parse_response(data)
-
     def _parse_response(self, data):
         """Convert API response to kitesurfing format"""
         return {
+            "time": data["hourly"].get("time"),
             "wind_speed": data["hourly"]["wind_speed_10m"],
-            "wind_direction": data["hourly"]["wind_direction_10m"]
+            "wind_direction": data["hourly"]["wind_direction_10m"],
+            "gust": data["hourly"].get("wind_gusts_10m"),
+            "temperature": data["hourly"].get("temperature_2m"),
+            "utc_offset_seconds": data.get("utc_offset_seconds", 0)
         }
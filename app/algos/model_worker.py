@@ -0,0 +1,257 @@
+"""
+Out-of-process NeuralGCM worker.
+
+One worker process holds the model and its cached rollout; API processes
+talk to it over a local socket, so HTTP workers can scale without each
+loading the checkpoint. Point queries that arrive within a few
+milliseconds of each other, from any connection, are answered with one
+vectorized lookup.
+
+Only needed with FORECAST_BACKEND=neuralgcm-worker. Run it as its own
+service with: python -m app.algos.model_worker
+
+Requests are pickled, so the worker only accepts clients that know
+NEURALGCM_WORKER_AUTHKEY (a long random secret shared by the worker and
+the API, e.g. from `openssl rand -hex 32`); neither side starts without
+it. NEURALGCM_WORKER_ADDRESS is either a Unix socket path, created
+owner-only, for a worker in the same container, or host:port. On
+platforms that run each process in its own container (Railway, Heroku)
+use TCP on the private network, e.g. the worker with
+NEURALGCM_WORKER_ADDRESS=[::]:7070 and NEURALGCM_WORKER_ALLOW_REMOTE=true,
+and the API with NEURALGCM_WORKER_ADDRESS=model.railway.internal:7070.
+Without NEURALGCM_WORKER_ALLOW_REMOTE the worker only listens on loopback.
+"""
+import os
+import time
+import queue
+import logging
+import ipaddress
+import threading
+from multiprocessing.connection import Client, Listener
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+WORKER_ADDRESS = os.getenv("NEURALGCM_WORKER_ADDRESS", "/tmp/kite-model-worker.sock")
+WORKER_AUTHKEY = os.getenv("NEURALGCM_WORKER_AUTHKEY", "")
+WORKER_ALLOW_REMOTE = os.getenv("NEURALGCM_WORKER_ALLOW_REMOTE", "false").lower() == "true"
+REQUEST_TIMEOUT = float(os.getenv("NEURALGCM_WORKER_TIMEOUT", "30"))  # Seconds to wait for a reply
+BATCH_WINDOW = float(os.getenv("NEURALGCM_WORKER_BATCH_WINDOW", "0.005"))  # Seconds to collect a batch
+MAX_BATCH_POINTS = int(os.getenv("NEURALGCM_WORKER_MAX_BATCH", "4096"))
+CLIENT_POOL_SIZE = 8    # Open connections kept per API process
+
+
+def _family(address: str) -> str:
+    return "AF_UNIX" if address.startswith("/") else "AF_INET"
+
+
+def _parse_address(address: str):
+    if address.startswith("/"):
+        return address
+    host, port = address.rsplit(":", 1)
+    return host.strip("[]"), int(port)
+
+
+def _authkey() -> bytes:
+    if not WORKER_AUTHKEY:
+        raise RuntimeError("NEURALGCM_WORKER_AUTHKEY must be set to a shared secret to use the model worker")
+    return WORKER_AUTHKEY.encode()
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class _PendingQuery:
+    def __init__(self, locations: List[Tuple[float, float]]):
+        self.locations = locations
+        self.result: Optional[list] = None
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+
+class ModelWorker:
+    """Serves point and region queries from one NeuralGCM model."""
+
+    def __init__(self, model, address: str = WORKER_ADDRESS):
+        self.model = model
+        self.address = address
+        self._queries: "queue.Queue[_PendingQuery]" = queue.Queue()
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._queries.get()]
+            points = len(batch[0].locations)
+            deadline = time.monotonic() + BATCH_WINDOW
+            while points < MAX_BATCH_POINTS:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    query = self._queries.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(query)
+                points += len(query.locations)
+
+            locations = [location for query in batch for location in query.locations]
+            try:
+                predictions = self.model.predict_points(locations)
+                offset = 0
+                for query in batch:
+                    query.result = predictions[offset:offset + len(query.locations)]
+                    offset += len(query.locations)
+            except Exception as e:
+                logger.error(f"Batched prediction failed: {str(e)}")
+                for query in batch:
+                    query.error = str(e)
+            for query in batch:
+                query.done.set()
+
+    def _handle(self, request: tuple):
+        kind, payload = request
+        if kind == "points":
+            query = _PendingQuery([tuple(location) for location in payload])
+            self._queries.put(query)
+            query.done.wait()
+            if query.error is not None:
+                return "error", query.error
+            return "ok", query.result
+        if kind == "region":
+            return "ok", self.model.predict_region(tuple(payload))
+        if kind == "ping":
+            return "ok", "pong"
+        return "error", f"Unknown request: {kind}"
+
+    def _serve_connection(self, conn):
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    response = self._handle(request)
+                except Exception as e:
+                    logger.error(f"Model worker request failed: {str(e)}")
+                    response = ("error", str(e))
+                try:
+                    conn.send(response)
+                except OSError:
+                    # The client gave up waiting and closed the connection
+                    return
+
+    def _listen(self) -> Listener:
+        authkey = _authkey()
+        address = _parse_address(self.address)
+        if _family(self.address) == "AF_INET":
+            if not WORKER_ALLOW_REMOTE and not _is_loopback(address[0]):
+                raise RuntimeError(
+                    f"Refusing to listen on non-loopback address {self.address}; "
+                    "set NEURALGCM_WORKER_ALLOW_REMOTE=true to serve a private network"
+                )
+            return Listener(address, family="AF_INET", authkey=authkey)
+
+        if os.path.exists(self.address):
+            os.remove(self.address)
+        # Create the socket owner-only from the start, not chmod'ed afterwards
+        umask = os.umask(0o177)
+        try:
+            return Listener(address, family="AF_UNIX", authkey=authkey)
+        finally:
+            os.umask(umask)
+
+    def serve_forever(self):
+        listener = self._listen()
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+        with listener:
+            logger.info(f"Model worker listening on {self.address}")
+            while True:
+                conn = listener.accept()
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+
+class ModelWorkerClient:
+    """
+    Talks to a model worker with the same methods as NeuralGCMWrapper.
+
+    Calls block, so run them in a thread from async code. Connections are
+    pooled; a broken one is dropped and the call is retried once. A worker
+    that does not answer within `timeout` seconds raises TimeoutError.
+    """
+
+    def __init__(self, address: str = WORKER_ADDRESS, pool_size: int = CLIENT_POOL_SIZE,
+                 timeout: float = REQUEST_TIMEOUT):
+        self.address = address
+        self.timeout = timeout
+        self._authkey = _authkey()
+        self._pool: "queue.LifoQueue" = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self):
+        return Client(_parse_address(self.address), family=_family(self.address), authkey=self._authkey)
+
+    def _request(self, kind: str, payload=None):
+        for attempt in range(2):
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                conn.send((kind, payload))
+                if not conn.poll(self.timeout):
+                    # A late reply would confuse the next caller, so drop the connection
+                    conn.close()
+                    raise TimeoutError(f"Model worker did not answer within {self.timeout}s")
+                status, result = conn.recv()
+            except TimeoutError:
+                raise
+            except (EOFError, OSError):
+                conn.close()
+                if attempt:
+                    raise
+                continue
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+            if status != "ok":
+                raise RuntimeError(f"Model worker error: {result}")
+            return result
+
+    def warmup(self):
+        """The worker warms its own model; just check it is reachable."""
+        self._request("ping")
+
+    def predict(self, lat: float, lon: float) -> Dict[str, list]:
+        return self.predict_points([(lat, lon)])[0]
+
+    def predict_points(self, locations: Sequence[Tuple[float, float]]) -> List[Dict[str, list]]:
+        return self._request("points", [tuple(location) for location in locations])
+
+    def predict_region(self, bbox: Tuple[float, float, float, float]) -> Dict[str, list]:
+        return self._request("region", tuple(bbox))
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    # Only the worker process imports neuralgcm/jax
+    from .neuralgcm_wrapper import NeuralGCMWrapper
+    model = NeuralGCMWrapper(os.getenv("NEURALGCM_CHECKPOINT_PATH") or None)
+    model.warmup()
+    ModelWorker(model).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
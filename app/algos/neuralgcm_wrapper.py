@@ -1,87 +1,225 @@
 # app/lib/neuralgcm_wrapper.py
+import os
+import threading
 import neuralgcm
 import jax
 import xarray as xr
 import numpy as np
 import logging
-from typing import Dict
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+from ..utils.grid_extraction import extract_points, extract_region, to_series
 
 logger = logging.getLogger(__name__)
 
+ROLLOUT_HOURS = int(os.getenv("NEURALGCM_ROLLOUT_HOURS", "72"))     # Forecast length per initialization
+OUTPUT_STEP_HOURS = int(os.getenv("NEURALGCM_OUTPUT_STEP_HOURS", "1"))
+CACHED_RUNS = int(os.getenv("NEURALGCM_CACHED_RUNS", "2"))           # Decoded rollouts kept in memory
+# Persist compiled XLA programs so restarts skip recompilation
+COMPILATION_CACHE_DIR = os.getenv("NEURALGCM_COMPILATION_CACHE_DIR")
+
+# Variable names used by different checkpoints
+WIND_COMPONENTS = (
+    ("u_component_of_wind", "v_component_of_wind"),
+    ("eastward_wind", "northward_wind"),
+)
+TEMPERATURE_NAMES = ("temperature", "air_temperature")
+
+if COMPILATION_CACHE_DIR:
+    jax.config.update("jax_compilation_cache_dir", COMPILATION_CACHE_DIR)
+
+
+class GridForecast:
+    """
+    Decoded near-surface fields of one rollout on the model grid.
+
+    Arrays are (time, latitude, longitude) with ascending latitudes and
+    longitudes in [0, 360).
+    """
+
+    def __init__(self, init_time, times, latitudes, longitudes, u, v, temperature=None):
+        self.init_time = init_time
+        self.times = times
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.u = u
+        self.v = v
+        self.temperature = temperature
+
+    def points(self, lats: Sequence[float], lons: Sequence[float]) -> List[Dict[str, list]]:
+        """Hourly series at each point, interpolated from the surrounding cells."""
+        values = extract_points(self.u, self.v, self.latitudes, self.longitudes, lats, lons, self.temperature)
+        return to_series(values, self.times)
+
+    def point(self, lat: float, lon: float) -> Dict[str, list]:
+        return self.points([lat], [lon])[0]
+
+    def region(self, bbox: Tuple[float, float, float, float]) -> Dict[str, list]:
+        """Hourly fields on the grid cells inside (min_lat, min_lon, max_lat, max_lon)."""
+        values = extract_region(self.u, self.v, self.latitudes, self.longitudes, bbox, self.temperature)
+        return {
+            "time": [str(time) for time in self.times],
+            **{name: np.round(array, 2).tolist() for name, array in values.items()},
+        }
+
+
 class NeuralGCMWrapper:
     def __init__(self, checkpoint_path: str = None):
         """
         Initialize NeuralGCM model wrapper
-        
+
         Args:
             checkpoint_path: Optional path to custom checkpoint
         """
+        self._runs: "OrderedDict[int, GridForecast]" = OrderedDict()
+        self._lock = threading.Lock()
         try:
             if checkpoint_path:
                 self.checkpoint = neuralgcm.load_checkpoint(checkpoint_path)
             else:
                 # Load TL63 stochastic demo
                 self.checkpoint = neuralgcm.demo.load_checkpoint_tl63_stochastic()
-                
+
             self.model = neuralgcm.PressureLevelModel.from_checkpoint(self.checkpoint)
             self.ds = neuralgcm.demo.load_data(self.model.data_coords)
-            
+
             # Verify available variables
             self.available_vars = list(self.ds.data_vars.keys())
             logger.info(f"Loaded NeuralGCM model with variables: {self.available_vars}")
-            
+
             # Initialize wind proxy if needed
-            if 'eastward_wind' not in self.available_vars:
+            if not any(u in self.available_vars for u, _ in WIND_COMPONENTS):
                 logger.warning("Wind components missing - using temperature gradients as proxy")
-                
+
         except Exception as e:
             logger.error(f"NeuralGCM initialization failed: {str(e)}")
             raise
 
+    def latest_init_index(self) -> int:
+        return self.ds.sizes["time"] - 1
+
+    def warmup(self):
+        """Compile the model and decode the latest rollout before the first request."""
+        self.rollout(self.latest_init_index())
+
+    def rollout(self, init_index: Optional[int] = None) -> GridForecast:
+        """
+        Decoded fields for one initialization time, computed once and cached.
+
+        Concurrent callers for the same initialization wait for the single
+        rollout in progress instead of running the model again.
+        """
+        if init_index is None:
+            init_index = self.latest_init_index()
+        with self._lock:
+            grid = self._runs.get(init_index)
+            if grid is None:
+                grid = self._run_model(init_index)
+                self._runs[init_index] = grid
+                while len(self._runs) > CACHED_RUNS:
+                    self._runs.popitem(last=False)
+            else:
+                self._runs.move_to_end(init_index)
+            return grid
+
+    def _run_model(self, init_index: int) -> GridForecast:
+        ds_init = self.ds.isel(time=init_index)
+        logger.info(f"Running NeuralGCM rollout from {ds_init.time.values}")
+
+        inputs = self.model.inputs_from_xarray(ds_init)
+        input_forcings = self.model.forcings_from_xarray(ds_init)
+        # Forcings are held fixed at the initial values over the rollout
+        all_forcings = self.model.forcings_from_xarray(self.ds.isel(time=slice(init_index, init_index + 1)))
+
+        # encode/advance/decode/unroll are jitted by neuralgcm; shapes are the same
+        # for every initialization, so only the first rollout pays for compilation
+        encoded = self.model.encode(inputs, input_forcings, jax.random.PRNGKey(0))
+        steps = ROLLOUT_HOURS // OUTPUT_STEP_HOURS
+        _, predictions = self.model.unroll(
+            encoded,
+            all_forcings,
+            steps=steps,
+            timedelta=np.timedelta64(OUTPUT_STEP_HOURS, "h"),
+            start_with_input=True,
+        )
+        times = ds_init.time.values + np.arange(steps) * np.timedelta64(OUTPUT_STEP_HOURS, "h")
+        decoded = self.model.data_to_xarray(predictions, times=times)
+
+        # Lowest model level, i.e. the highest pressure, as the near-surface proxy
+        if "level" in decoded.dims:
+            decoded = decoded.sel(level=decoded.level.max())
+        decoded = decoded.sortby("latitude").sortby("longitude")
+
+        def field(name):
+            return np.asarray(decoded[name].transpose("time", "latitude", "longitude").values, dtype=np.float32)
+
+        components = next(((u, v) for u, v in WIND_COMPONENTS if u in decoded and v in decoded), None)
+        temperature_name = next((name for name in TEMPERATURE_NAMES if name in decoded), None)
+        if components:
+            # Real wind components available
+            u, v = field(components[0]), field(components[1])
+        else:
+            # Fallback: Use temperature gradients as wind proxy
+            logger.info("Using temperature gradients as wind proxy")
+            temp = field(temperature_name)
+            u = np.gradient(temp, axis=1)  # Latitudinal gradient
+            v = np.gradient(temp, axis=2)  # Longitudinal gradient
+
+        return GridForecast(
+            init_time=ds_init.time.values,
+            times=decoded.time.values,
+            latitudes=decoded.latitude.values,
+            longitudes=decoded.longitude.values % 360,
+            u=u,
+            v=v,
+            temperature=field(temperature_name) if temperature_name else None,
+        )
+
     def predict(self, lat: float, lon: float) -> Dict[str, list]:
         """
-        Generate wind predictions using available variables
-        
+        Generate wind predictions for a point from the cached rollout
+
         Args:
             lat: Latitude in degrees
             lon: Longitude in degrees
-            
+
         Returns:
-            Dictionary with wind_speed and wind_direction lists
+            Dictionary with hourly time, wind_speed (knots), wind_direction
+            and temperature (°C) lists
         """
         try:
-            # Get model prediction
-            ds_init = self.ds.isel(time=0)
-            inputs, forcings = self.model.data_from_xarray(ds_init)
-            encoded = self.model.encode(inputs, forcings, jax.random.PRNGKey(0))
-            advanced = self.model.advance(encoded, forcings)
-            decoded = self.model.decode(advanced, forcings)
-
-            # Extract wind data based on available variables
-            if 'eastward_wind' in decoded and 'northward_wind' in decoded:
-                # Real wind components available
-                u = decoded["eastward_wind"].values.squeeze()
-                v = decoded["northward_wind"].values.squeeze()
-            else:
-                # Fallback: Use temperature gradients as wind proxy
-                logger.info("Using temperature gradients as wind proxy")
-                temp = decoded["air_temperature"].values.squeeze()
-                u = np.gradient(temp, axis=1)  # Latitudinal gradient
-                v = np.gradient(temp, axis=2)  # Longitudinal gradient
-
-            # Convert to wind speed/direction
-            wind_speed = np.sqrt(u**2 + v**2).tolist()
-            wind_dir = (np.degrees(np.arctan2(-u, -v)) % 360).tolist()
-
-            return {
-                "wind_speed": wind_speed,
-                "wind_direction": wind_dir
-            }
-
+            return self.rollout().point(lat, lon)
         except Exception as e:
             logger.error(f"Prediction failed: {str(e)}")
             return {"wind_speed": [], "wind_direction": []}
 
+    def predict_points(self, locations: Sequence[Tuple[float, float]]) -> List[Dict[str, list]]:
+        """
+        Wind predictions for many points from one vectorized lookup
+
+        Args:
+            locations: (lat, lon) pairs
+
+        Returns:
+            One prediction per location, in the same order
+        """
+        lats = [lat for lat, _ in locations]
+        lons = [lon for _, lon in locations]
+        return self.rollout().points(lats, lons)
+
+    def predict_region(self, bbox: Tuple[float, float, float, float]) -> Dict[str, list]:
+        """
+        Gridded wind predictions inside a bounding box
+
+        Args:
+            bbox: (min_lat, min_lon, max_lat, max_lon) in degrees
+
+        Returns:
+            Dictionary with time, latitude and longitude axes and
+            (time, latitude, longitude) nested lists per variable
+        """
+        return self.rollout().region(bbox)
+
     @staticmethod
     def request_access(email: str):
         """Request access to full model checkpoints"""
@@ -93,6 +231,8 @@ class NeuralGCMWrapper:
         try:
             self.checkpoint = neuralgcm.load_checkpoint(path)
             self.model = neuralgcm.PressureLevelModel.from_checkpoint(self.checkpoint)
+            with self._lock:
+                self._runs.clear()
             logger.info(f"Loaded custom checkpoint from {path}")
         except Exception as e:
             logger.error(f"Failed to load custom checkpoint: {str(e)}")
@@ -1,18 +1,36 @@
-from fastapi import APIRouter, Query, HTTPException
-import sqlite3
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
-import os
+from fastapi import APIRouter, Query, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Dict, Any, Literal, Union, Tuple
+from pydantic import BaseModel, Field, conint, root_validator
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import random
-import math
+import numpy as np
+from ..services.kitespot_repository import get_kitespot_repository, DatabaseNotFoundError
+from ..services.suggestion_index import get_suggestion_index, SUGGESTION_BACKEND
+from ..services.spatial_index import get_spatial_index
+from ..services.weather_service import get_weather_service
+from ..services.forecast_prefetcher import get_forecast_prefetcher
+from ..services.forecast_store import get_forecast_store, to_wind_data
+from ..services.catalogue_snapshot import get_catalogue_snapshot, SerializedView, serialize_json, spot_details
+from ..services.catalogue_export import get_catalogue_exporter, attach_conditions
+from ..utils.kite_window_calculator import (
+    MIN_RIDEABLE_SPEED, GOLDEN_WINDOW_MIN_SCORE, top_k_windows, best_windows
+)
+from ..utils.forecast_generator import SyntheticForecast, MAX_FORECAST_DAYS, generate_forecast, generate_forecasts
+from ..utils import forecast_encoding
+from ..utils.responses import dumps, trusted
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
-
-# Database path
-DB_PATH = 'data/kitespots.db'
+repository = get_kitespot_repository()
+suggestion_index = get_suggestion_index()
+spatial_index = get_spatial_index()
+weather_service = get_weather_service()
+prefetcher = get_forecast_prefetcher()
+forecast_store = get_forecast_store()
+catalogue_snapshot = get_catalogue_snapshot()
+catalogue_exporter = get_catalogue_exporter()
 
 class KitespotSuggestion(BaseModel):
     id: int
@@ -38,6 +56,15 @@ class KiteSpot(BaseModel):
     facilities: Optional[List[str]] = None
     hazards: Optional[List[str]] = None
 
+class NearbySpot(BaseModel):
+    id: int
+    name: str
+    location: str
+    country: Optional[str] = None
+    latitude: float
+    longitude: float
+    distance_km: float
+
 class SpotForecast(BaseModel):
     time: str
     wind_speed: float
@@ -55,40 +82,191 @@ class SpotForecastResponse(BaseModel):
     forecast: List[SpotForecast]
     golden_kitewindow: Optional[GoldenKiteWindow] = None
 
+class GoldenWindowsRequest(BaseModel):
+    spot_ids: Union[Literal["all"], List[int]] = "all"
+    window_sizes: List[conint(ge=1, le=MAX_FORECAST_DAYS * 24)] = Field(default=[3], min_items=1)
+    hours: int = Field(72, ge=1, le=MAX_FORECAST_DAYS * 24)
+    limit: Optional[int] = Field(None, ge=1)
+
+    @root_validator(skip_on_failure=True)
+    def windows_fit_horizon(cls, values):
+        too_long = [size for size in values["window_sizes"] if size > values["hours"]]
+        if too_long:
+            raise ValueError(f"window_sizes {too_long} are longer than the {values['hours']} hour horizon")
+        return values
+
+class SpotBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_items=1, max_items=1000)
+    conditions: Literal["cached", "live"] = "cached"
+
+class SpotGoldenWindow(BaseModel):
+    spot_id: int
+    name: str
+    location: str
+    start_time: str
+    end_time: str
+    window_size: int
+    score: float
+
+def _local_start(wind_data: dict, now: Optional[datetime] = None) -> datetime:
+    """The current hour in the local time of an ECMWF forecast, as a naive datetime."""
+    now = now or datetime.now(timezone.utc)
+    local_now = now.astimezone(timezone.utc) + timedelta(seconds=int(wind_data.get("utc_offset_seconds") or 0))
+    return local_now.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+
+def _forecast_from_wind_data(wind_data: dict, spot: dict, hours: int, now: Optional[datetime] = None,
+                             simulated: Optional[SyntheticForecast] = None) -> Optional[SyntheticForecast]:
+    """
+    Hourly forecast arrays from prefetched ECMWF data.
+    
+    ECMWF times are local to the spot and start at local midnight, so the
+    forecast covers the `hours` hours from the current local hour on.
+    Returns None if none of them have wind data.
+    
+    Hours the ECMWF data does not cover, such as the tail past its horizon,
+    come from the spot's simulated forecast, so the forecast always has
+    `hours` hours. Precipitation probability is not part of the ECMWF data
+    and comes from the simulated forecast too, as do the gust factor and
+    the temperature when the upstream left them out. That keeps repeated
+    requests identical.
+    
+    :param simulated: The spot's simulated forecast over the same hours,
+        if it was already generated
+    """
+    def column(name):
+        values = wind_data.get(name) or []
+        values = values + [None] * (len(wind_data["time"]) - len(values))
+        return np.array(values, dtype=np.float64)  # None becomes NaN
+    
+    start_time = _local_start(wind_data, now)
+    start = np.datetime64(start_time, "h")
+    
+    times = np.array(wind_data["time"], dtype="datetime64[h]")
+    wind_speed = column("wind_speed")
+    wind_direction = column("wind_direction")
+    # Past hours, hours beyond the horizon and hours without wind data are left out
+    present = (times >= start) & (times < start + hours) & ~(np.isnan(wind_speed) | np.isnan(wind_direction))
+    if not present.any():
+        return None
+    wind_speed, wind_direction = wind_speed[present], wind_direction[present]
+    gust, temperature = column("gust")[present], column("temperature")[present]
+    
+    if simulated is None:
+        simulated = generate_forecast(spot['id'], start_time, hours)
+    index = (times[present] - start).astype(np.int64)
+    forecast = simulated._replace(
+        wind_speed=simulated.wind_speed.copy(),
+        wind_direction=simulated.wind_direction.copy(),
+        temperature=simulated.temperature.copy(),
+        gust=simulated.gust.copy()
+    )
+    forecast.wind_speed[index] = np.round(wind_speed, 1)
+    forecast.wind_direction[index] = np.floor(wind_direction)
+    forecast.gust[index] = np.round(
+        np.where(np.isnan(gust), wind_speed * simulated.gust[index] / simulated.wind_speed[index], gust), 1
+    )
+    forecast.temperature[index] = np.round(np.where(np.isnan(temperature), spot['temperature'], temperature), 1)
+    return forecast
+
+def _prefetched_wind_data(spot: dict) -> Optional[dict]:
+    """
+    The spot's prefetched ECMWF data: the warm cache entry, or after a
+    restart, when the cache is cold, the last stored run. Returns None if
+    there is neither.
+    """
+    wind_data = None
+    if spot['coordinates']:
+        lat, lon = (float(value) for value in spot['coordinates'].split(","))
+        wind_data = weather_service.peek_wind_data(lat, lon)
+    if wind_data is None:
+        stored = forecast_store.latest(spot['id'])
+        if stored is not None:
+            wind_data = to_wind_data(stored)
+    if wind_data is None or not wind_data.get("time"):
+        return None
+    return wind_data
+
+def _golden_window(forecast: SyntheticForecast, times: List[str]) -> Optional[dict]:
+    """The best rideable 3-hour window for kitesurfing, if it is good enough."""
+    best_windows = top_k_windows(
+        forecast.wind_speed, forecast.wind_direction, window_sizes=(3,), k=1, min_speed=MIN_RIDEABLE_SPEED
+    )
+    if best_windows and best_windows[0].score > GOLDEN_WINDOW_MIN_SCORE:
+        best = best_windows[0]
+        return {
+            "start_time": times[best.start_index],
+            "end_time": times[best.end_index],
+            "score": round(best.score, 3)
+        }
+    return None
+
+def _forecast_rows(forecast: SyntheticForecast, times: List[str], golden_window: Optional[dict]) -> dict:
+    """Hourly forecast objects plus the golden window, shaped like SpotForecastResponse."""
+    columns = zip(
+        times,
+        forecast.wind_speed.tolist(),
+        forecast.wind_direction.astype(int).tolist(),
+        forecast.temperature.tolist(),
+        forecast.gust.tolist(),
+        forecast.precipitation_probability.tolist()
+    )
+    return {
+        "forecast": [
+            {
+                "time": time,
+                "wind_speed": wind_speed,
+                "wind_direction": wind_direction,
+                "temperature": temperature,
+                "gust": gust,
+                "precipitation_probability": precipitation_probability
+            }
+            for time, wind_speed, wind_direction, temperature, gust, precipitation_probability in columns
+        ],
+        "golden_kitewindow": golden_window
+    }
+
+def _forecast_response(forecast: SyntheticForecast, response_format: str, accept: Optional[str]):
+    """
+    Encode a forecast as requested.
+    
+    Binary encodings are chosen with the Accept header and are always
+    columnar; JSON is per-hour rows unless ?format=columnar.
+    """
+    times = np.datetime_as_string(forecast.times, unit="s").tolist()
+    golden_window = _golden_window(forecast, times)
+    
+    # The same URL has several representations, so caches must key on Accept
+    headers = {"Vary": "Accept"}
+    encoding = forecast_encoding.negotiate(accept)
+    if encoding == "float32":
+        body, layout = forecast_encoding.to_float32(forecast, golden_window)
+        return Response(content=body, media_type=forecast_encoding.OCTET_STREAM, headers={**headers, **layout})
+    if encoding == "msgpack":
+        return Response(
+            content=forecast_encoding.to_msgpack(forecast, golden_window),
+            media_type="application/x-msgpack",
+            headers=headers
+        )
+    if response_format == "columnar":
+        return Response(
+            content=dumps(forecast_encoding.columnar(forecast, golden_window)),
+            media_type="application/json",
+            headers=headers
+        )
+    return trusted(_forecast_rows(forecast, times, golden_window), headers=headers)
+
 @router.get("/api/kitespot-suggestions", response_model=List[KitespotSuggestion])
 async def get_kitespot_suggestions(q: str = Query(..., min_length=1)):
     """
     Get kitespot suggestions based on search query.
     This endpoint is used for autocomplete functionality.
     """
-    # Connect to the database
-    if not os.path.exists(DB_PATH):
-        logger.error(f"Database file not found at {DB_PATH}")
-        return []
-        
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row  # This enables column access by name
-        cursor = conn.cursor()
-        
         # Search for kitespots that match the query
-        search_term = f"%{q.lower()}%"
-        cursor.execute('''
-        SELECT id, name, location, country
-        FROM kitespots
-        WHERE search_text LIKE ?
-        ORDER BY 
-            CASE 
-                WHEN name LIKE ? THEN 1
-                WHEN location LIKE ? THEN 2
-                ELSE 3
-            END,
-            name
-        LIMIT 10
-        ''', (search_term, f"{q}%", f"{q}%"))
-        
-        results = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        if SUGGESTION_BACKEND == "memory":
+            results = await suggestion_index.search(q, limit=10)
+        else:
+            results = await repository.search_suggestions(q, limit=10)
         
         # Format results for display
         suggestions = []
@@ -101,258 +279,382 @@ async def get_kitespot_suggestions(q: str = Query(..., min_length=1)):
             
             location_str = ", ".join(location_parts)
             
-            suggestions.append(KitespotSuggestion(
-                id=row['id'],
-                name=row['name'],
-                location=location_str,
-                country=row['country']
-            ))
+            suggestions.append({
+                "id": row['id'],
+                "name": row['name'],
+                "location": location_str,
+                "country": row['country']
+            })
         
-        return suggestions
+        return trusted(suggestions)
+    except DatabaseNotFoundError as e:
+        logger.error(str(e))
+        return []
     except Exception as e:
         logger.error(f"Error fetching kitespot suggestions: {str(e)}")
         return []
 
+def _json_view(request: Request, view: SerializedView) -> Response:
+    """
+    Send pre-serialized JSON, or 304 Not Modified if the client has it already.
+    """
+    headers = {"ETag": view.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or view.etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=view.body, media_type="application/json", headers=headers)
+
+def _parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    try:
+        min_lat, min_lon, max_lat, max_lon = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lat,min_lon,max_lat,max_lon")
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise HTTPException(status_code=400, detail="bbox is out of range")
+    return min_lat, min_lon, max_lat, max_lon
+
+def _parse_fields(fields: str) -> List[str]:
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in KiteSpot.__fields__]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # The id is always included so clients can page and look spots up
+    return ["id"] + [field for field in requested if field != "id"]
+
 @router.get("/api/spots", response_model=List[KiteSpot])
-async def get_spots():
+async def get_spots(
+    request: Request,
+    after_id: Optional[int] = Query(None, description="Return spots after this id (from X-Next-Cursor)"),
+    limit: int = Query(50, ge=1, le=1000),
+    country: Optional[str] = Query(None),
+    difficulty: Optional[str] = Query(None),
+    water_type: Optional[str] = Query(None),
+    bbox: Optional[str] = Query(None, description="min_lat,min_lon,max_lat,max_lon"),
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, e.g. id,name,coordinates")
+):
     """
-    Get all kitespots with current conditions.
+    Get kitespots with current conditions, one page at a time in id order.
+    
+    Without parameters the first page is served from the catalogue snapshot
+    as ready-made JSON. Filters and the cursor are applied in SQL; the
+    X-Next-Cursor header holds the after_id of the next page, if any.
+    Every response has an ETag so unchanged pages cost a 304.
     """
-    if not os.path.exists(DB_PATH):
-        logger.error(f"Database file not found at {DB_PATH}")
-        raise HTTPException(status_code=404, detail="Kitespot database not found")
-        
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT id, name, location, country, latitude, longitude, difficulty, water_type
-        FROM kitespots
-        LIMIT 50
-        ''')
-        
-        spots = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        # Reject bad parameters before touching the database
+        projection = _parse_fields(fields) if fields else None
+        bounds = _parse_bbox(bbox) if bbox else None
         
-        # Add simulated weather data and other required fields
-        result = []
-        for spot in spots:
-            # Generate random but realistic weather data
-            wind_speed = round(random.uniform(8, 25), 1)
-            wind_direction = random.randint(0, 359)
-            temperature = round(random.uniform(15, 30), 1)
-            gust = round(wind_speed * random.uniform(1.1, 1.4), 1)
-            
-            # Generate a description if none exists
-            description = f"{spot['name']} is a popular kitesurfing spot located in {spot['location']}, {spot['country']}. " \
-                         f"It features {spot['water_type'].lower()} water conditions and is suitable for {spot['difficulty'].lower()} riders."
-            
-            # Format coordinates as string
-            coordinates = f"{spot['latitude']},{spot['longitude']}" if spot['latitude'] and spot['longitude'] else None
-            
-            # Create a complete spot object
-            result.append(KiteSpot(
-                id=spot['id'],
-                name=spot['name'],
-                location=f"{spot['location']}, {spot['country']}",
-                coordinates=coordinates,
-                wind_speed=wind_speed,
-                wind_direction=wind_direction,
-                temperature=temperature,
-                gust=gust,
-                difficulty=spot['difficulty'] or "Intermediate",
-                water_type=spot['water_type'] or "Flat",
-                description=description,
-                image_url=f"/placeholder.svg?height=400&width=600&text={spot['name']}",
-                rating=round(random.uniform(3.5, 5.0), 1),
-                review_count=random.randint(10, 200),
-                facilities=random.sample(["Parking", "Rentals", "Schools", "Restaurants", "Showers", "Toilets", "Accommodation"], 
-                                        random.randint(2, 5)),
-                hazards=random.sample(["Strong currents", "Shallow areas", "Rocks", "Boat traffic", "Jellyfish"], 
-                                     random.randint(0, 3))
-            ))
+        snapshot = await catalogue_snapshot.get()
+        default_page = limit == 50 and not any(
+            value is not None for value in (after_id, country, difficulty, water_type, bbox, fields)
+        )
+        if default_page:
+            rows = spots = snapshot.spots[:limit]
+            view = snapshot.listing
+        else:
+            rows = await repository.list_spots_page(
+                after_id=after_id,
+                limit=limit,
+                country=country,
+                difficulty=difficulty,
+                water_type=water_type,
+                bbox=bounds
+            )
+            spots = [snapshot.by_id[row['id']] for row in rows if row['id'] in snapshot.by_id]
+            body = spots
+            if projection:
+                body = [{field: spot[field] for field in projection} for spot in spots]
+            view = serialize_json(body)
         
-        return result
+        response = _json_view(request, view)
+        if len(rows) == limit:
+            # Continue after the last spot in the body; only when the whole
+            # page was missing from the snapshot skip past the rows read
+            last_id = spots[-1]['id'] if spots else rows[-1]['id']
+            response.headers["X-Next-Cursor"] = str(last_id)
+        return response
+    except HTTPException:
+        raise
+    except DatabaseNotFoundError as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=404, detail="Kitespot database not found")
     except Exception as e:
         logger.error(f"Error fetching spots: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching spots: {str(e)}")
 
 @router.get("/api/spots/featured", response_model=List[KiteSpot])
-async def get_featured_spots():
+async def get_featured_spots(request: Request):
     """
     Get featured kitespots.
     """
-    # For simplicity, we'll just return the first 3 spots from the regular spots endpoint
-    spots = await get_spots()
-    return spots[:3]
+    try:
+        # For simplicity, the featured spots are the first 3 of the listing
+        snapshot = await catalogue_snapshot.get()
+        return _json_view(request, snapshot.featured)
+    except DatabaseNotFoundError as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=404, detail="Kitespot database not found")
+    except Exception as e:
+        logger.error(f"Error fetching featured spots: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching featured spots: {str(e)}")
 
-@router.get("/api/spots/{spot_id}", response_model=KiteSpot)
-async def get_spot_by_id(spot_id: int):
+@router.post("/api/spots/golden-windows", response_model=List[SpotGoldenWindow])
+async def get_golden_windows(request: GoldenWindowsRequest):
     """
-    Get a specific kitespot by ID.
+    Rank kitespots by their best rideable kite window.
+    
+    Each spot uses the forecast /api/spots/{id}/forecast serves: the
+    prefetched ECMWF forecast where there is one, otherwise the simulated
+    one. The forecasts are stacked into one (spots x hours) matrix and
+    every window of every requested length is scored in a single
+    vectorized pass.
     """
-    if not os.path.exists(DB_PATH):
-        logger.error(f"Database file not found at {DB_PATH}")
-        raise HTTPException(status_code=404, detail="Kitespot database not found")
+    try:
+        snapshot = await catalogue_snapshot.get()
+        if request.spot_ids == "all":
+            spots = snapshot.spots
+        else:
+            spots = [snapshot.by_id[spot_id] for spot_id in dict.fromkeys(request.spot_ids) if spot_id in snapshot.by_id]
+        if not spots:
+            return []
+        
+        # Simulated forecasts are generated together for all spots that start
+        # at the same hour: the server's for spots without ECMWF data, the
+        # local one for the others, whose ECMWF hours then replace them
+        hours = request.hours
+        now = datetime.now(timezone.utc)
+        server_start = datetime.now().replace(minute=0, second=0, microsecond=0)
+        wind_data = [_prefetched_wind_data(spot) for spot in spots]
+        groups: Dict[datetime, List[int]] = {}
+        for i, data in enumerate(wind_data):
+            groups.setdefault(_local_start(data, now) if data is not None else server_start, []).append(i)
+        
+        times = np.empty((len(spots), hours), dtype="datetime64[h]")
+        wind_speed = np.empty((len(spots), hours))
+        wind_direction = np.empty((len(spots), hours))
+        for start_time, members in groups.items():
+            simulated = generate_forecasts([spots[i]['id'] for i in members], start_time, hours)
+            for row, i in enumerate(members):
+                forecast = simulated.row(row)
+                if wind_data[i] is not None:
+                    forecast = _forecast_from_wind_data(wind_data[i], spots[i], hours, now, forecast) or forecast
+                times[i], wind_speed[i], wind_direction[i] = forecast.times, forecast.wind_speed, forecast.wind_direction
+        
+        starts, sizes, scores = best_windows(wind_speed, wind_direction, request.window_sizes, MIN_RIDEABLE_SPEED)
+        
+        # Drop spots without a rideable window before taking the top `limit`
+        ranking = [i for i in np.argsort(-scores, kind="stable") if np.isfinite(scores[i])]
+        if request.limit:
+            ranking = ranking[:request.limit]
+        
+        result = []
+        for i in ranking:
+            spot = spots[i]
+            start, size = int(starts[i]), int(sizes[i])
+            result.append({
+                "spot_id": spot['id'],
+                "name": spot['name'],
+                "location": spot['location'],
+                "start_time": times[i, start].astype(datetime).isoformat(),
+                "end_time": times[i, start + size - 1].astype(datetime).isoformat(),
+                "window_size": size,
+                "score": round(float(scores[i]), 3)
+            })
         
+        return trusted(result)
+    except DatabaseNotFoundError as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=404, detail="Kitespot database not found")
+    except Exception as e:
+        logger.error(f"Error ranking golden windows: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error ranking golden windows: {str(e)}")
+
+@router.get("/api/spots/nearby", response_model=List[NearbySpot])
+async def get_nearby_spots(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0),
+    k: int = Query(10, ge=1, le=100)
+):
+    """
+    Get the kitespots closest to a location, nearest first.
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        nearest = await spatial_index.nearest(lat, lon, k=k, radius_km=radius_km)
+        return trusted([
+            {
+                "id": spot['id'],
+                "name": spot['name'],
+                "location": spot['location'],
+                "country": spot['country'],
+                "latitude": spot['latitude'],
+                "longitude": spot['longitude'],
+                "distance_km": round(distance, 2)
+            }
+            for spot, distance in nearest
+        ])
+    except DatabaseNotFoundError as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=404, detail="Kitespot database not found")
+    except Exception as e:
+        logger.error(f"Error fetching nearby spots: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching nearby spots: {str(e)}")
+
+@router.get("/api/spots/export")
+async def export_spots(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    conditions: Literal["none", "cached", "live"] = Query(
+        "cached", description="cached: warm forecasts only; live: fetch missing forecasts upstream"
+    )
+):
+    """
+    Stream the whole catalogue with current conditions as NDJSON or CSV.
+    
+    Rows are read from one database cursor and written out batch by batch,
+    so the export never holds the full catalogue in memory. Spots without a
+    forecast get the simulated conditions the listings show.
+    """
+    if repository.data_version() is None:
+        # Checked up front: once streaming starts the status can't change
+        raise HTTPException(status_code=404, detail="Kitespot database not found")
+    
+    if export_format == "csv":
+        body, media_type = catalogue_exporter.to_csv(conditions), "text/csv"
+    else:
+        body, media_type = catalogue_exporter.to_ndjson(conditions), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="kitespots.{export_format}"'}
+    )
+
+@router.post("/api/spots/batch", response_model=List[KiteSpot])
+async def get_spots_batch(request: SpotBatchRequest):
+    """
+    Get several kitespots at once, in the order of the requested IDs.
+    
+    All spots are read with one query and their conditions are looked up
+    together: warm forecasts from the cache by default, or with one batched
+    upstream fetch for conditions=live. Unknown and repeated IDs are left
+    out of the response.
+    """
+    try:
+        ids = list(dict.fromkeys(request.ids))
+        rows_by_id = {row['id']: row for row in await repository.get_spots_by_ids(ids)}
+        rows = [rows_by_id[spot_id] for spot_id in ids if spot_id in rows_by_id]
         
-        cursor.execute('''
-        SELECT id, name, location, country, latitude, longitude, difficulty, water_type
-        FROM kitespots
-        WHERE id = ?
-        ''', (spot_id,))
+        spots = [spot_details(row) for row in rows]
+        await attach_conditions(spots, request.conditions, weather_service)
+        for spot in spots:
+            del spot['conditions_source']
+            prefetcher.record_request(spot['id'])
         
-        spot = cursor.fetchone()
-        conn.close()
+        return trusted(spots)
+    except DatabaseNotFoundError as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=404, detail="Kitespot database not found")
+    except Exception as e:
+        logger.error(f"Error fetching spots batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching spots batch: {str(e)}")
+
+@router.get("/api/spots/{spot_id}", response_model=KiteSpot)
+async def get_spot_by_id(spot_id: int):
+    """
+    Get a specific kitespot by ID.
+    
+    Conditions are looked up like /api/spots/batch does: the current hour
+    of the warm forecast when there is one, otherwise simulated.
+    """
+    try:
+        snapshot = await catalogue_snapshot.get()
+        spot = snapshot.by_id.get(spot_id)
         
         if not spot:
             raise HTTPException(status_code=404, detail=f"Kitespot with ID {spot_id} not found")
         
-        spot = dict(spot)
-        
-        # Generate random but realistic weather data
-        wind_speed = round(random.uniform(8, 25), 1)
-        wind_direction = random.randint(0, 359)
-        temperature = round(random.uniform(15, 30), 1)
-        gust = round(wind_speed * random.uniform(1.1, 1.4), 1)
-        
-        # Generate a description if none exists
-        description = f"{spot['name']} is a popular kitesurfing spot located in {spot['location']}, {spot['country']}. " \
-                     f"It features {spot['water_type'].lower() if spot['water_type'] else 'various'} water conditions and is suitable for " \
-                     f"{spot['difficulty'].lower() if spot['difficulty'] else 'intermediate'} riders."
+        prefetcher.record_request(spot_id)
         
-        # Format coordinates as string
-        coordinates = f"{spot['latitude']},{spot['longitude']}" if spot['latitude'] and spot['longitude'] else None
+        spot = dict(spot)
+        await attach_conditions([spot], "cached", weather_service)
+        del spot['conditions_source']
         
-        # Create a complete spot object
-        return KiteSpot(
-            id=spot['id'],
-            name=spot['name'],
-            location=f"{spot['location']}, {spot['country']}",
-            coordinates=coordinates,
-            wind_speed=wind_speed,
-            wind_direction=wind_direction,
-            temperature=temperature,
-            gust=gust,
-            difficulty=spot['difficulty'] or "Intermediate",
-            water_type=spot['water_type'] or "Flat",
-            description=description,
-            image_url=f"/placeholder.svg?height=400&width=600&text={spot['name']}",
-            rating=round(random.uniform(3.5, 5.0), 1),
-            review_count=random.randint(10, 200),
-            facilities=random.sample(["Parking", "Rentals", "Schools", "Restaurants", "Showers", "Toilets", "Accommodation"], 
-                                    random.randint(2, 5)),
-            hazards=random.sample(["Strong currents", "Shallow areas", "Rocks", "Boat traffic", "Jellyfish"], 
-                                 random.randint(0, 3))
-        )
+        return trusted(spot)
     except HTTPException:
         raise
+    except DatabaseNotFoundError as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=404, detail="Kitespot database not found")
     except Exception as e:
         logger.error(f"Error fetching spot with ID {spot_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching spot: {str(e)}")
 
 @router.get("/api/spots/{spot_id}/forecast", response_model=SpotForecastResponse)
-async def get_spot_forecast(spot_id: int):
+async def get_spot_forecast(
+    request: Request,
+    spot_id: int,
+    days: int = Query(3, ge=1, le=MAX_FORECAST_DAYS),
+    response_format: Literal["rows", "columnar"] = Query("rows", alias="format")
+):
     """
     Get forecast data for a specific kitespot.
+    
+    Serves the prefetched ECMWF forecast when there is one. Otherwise the
+    forecast is simulated, reproducibly for each spot and date.
+    
+    `?format=columnar` returns parallel arrays with a start time and step
+    instead of one object per hour. Sending `Accept: application/octet-stream`
+    returns the arrays as raw little-endian float32 (layout in the
+    X-Forecast-* headers), and `Accept: application/x-msgpack` returns
+    MessagePack when msgpack is installed.
     """
     try:
-        # Get the spot to ensure it exists
-        spot = await get_spot_by_id(spot_id)
-        
-        # Generate a 3-day hourly forecast (72 hours)
-        forecast = []
-        start_time = datetime.now().replace(minute=0, second=0, microsecond=0)
-        
-        # Base wind speed and direction from the spot
-        base_wind_speed = spot.wind_speed
-        base_wind_direction = spot.wind_direction
-        
-        # Generate hourly forecast with realistic variations
-        for i in range(72):
-            forecast_time = start_time + timedelta(hours=i)
-            
-            # Add daily and hourly variations to make the forecast realistic
-            day_factor = 1.0 + 0.2 * math.sin(2 * math.pi * (forecast_time.hour - 12) / 24)  # Peak at noon
-            random_factor = random.uniform(0.8, 1.2)
-            
-            wind_speed = round(base_wind_speed * day_factor * random_factor, 1)
-            wind_direction = (base_wind_direction + random.randint(-20, 20)) % 360
-            temperature = round(spot.temperature + 5 * math.sin(2 * math.pi * (forecast_time.hour - 14) / 24), 1)  # Peak at 2pm
-            gust = round(wind_speed * random.uniform(1.1, 1.5), 1)
-            precip_prob = round(random.uniform(0, 30), 1)
-            
-            forecast.append(SpotForecast(
-                time=forecast_time.isoformat(),
-                wind_speed=wind_speed,
-                wind_direction=wind_direction,
-                temperature=temperature,
-                gust=gust,
-                precipitation_probability=precip_prob
-            ))
-        
-        # Find the best window for kitesurfing (3-hour window with highest wind speeds in the ideal range)
-        best_window_start = None
-        best_window_end = None
-        best_score = 0
-        
-        for i in range(len(forecast) - 3):
-            window = forecast[i:i+3]
-            
-            # Calculate score based on wind speed (ideal is 15-20 knots)
-            scores = []
-            for hour in window:
-                if 15 <= hour.wind_speed <= 20:
-                    score = 1.0  # Perfect
-                elif 12 <= hour.wind_speed < 15 or 20 < hour.wind_speed <= 25:
-                    score = 0.7  # Good
-                elif 8 <= hour.wind_speed < 12:
-                    score = 0.4  # Fair
-                else:
-                    score = 0.2  # Poor
-                scores.append(score)
-            
-            avg_score = sum(scores) / len(scores)
-            
-            if avg_score > best_score:
-                best_score = avg_score
-                best_window_start = window[0].time
-                best_window_end = window[-1].time
+        # Get the spot from the catalogue snapshot to ensure it exists
+        snapshot = await catalogue_snapshot.get()
+        spot = snapshot.by_id.get(spot_id)
+        if not spot:
+            raise HTTPException(status_code=404, detail=f"Kitespot with ID {spot_id} not found")
+        prefetcher.record_request(spot_id)
         
-        # Create golden kite window if a good window was found
-        golden_window = None
-        if best_score > 0.5:
-            golden_window = GoldenKiteWindow(
-                start_time=best_window_start,
-                end_time=best_window_end,
-                score=best_score
-            )
+        # Serve the prefetched ECMWF forecast when there is one
+        forecast = None
+        wind_data = _prefetched_wind_data(spot)
+        if wind_data is not None:
+            forecast = _forecast_from_wind_data(wind_data, spot, days * 24)
+        if forecast is None:
+            start_time = datetime.now().replace(minute=0, second=0, microsecond=0)
+            forecast = generate_forecast(spot_id, start_time, days * 24)
         
-        return SpotForecastResponse(
-            forecast=forecast,
-            golden_kitewindow=golden_window
-        )
+        return _forecast_response(forecast, response_format, request.headers.get("accept"))
     except HTTPException:
         raise
+    except DatabaseNotFoundError as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=404, detail="Kitespot database not found")
     except Exception as e:
         logger.error(f"Error generating forecast for spot {spot_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating forecast: {str(e)}")
 
 @router.get("/api/current-conditions")
-async def get_current_conditions():
+async def get_current_conditions(
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180)
+):
     """
     Get current weather conditions and the nearest kitespot.
     """
     try:
-        # Get a random spot to simulate the nearest spot
-        spots = await get_spots()
-        nearest_spot = random.choice(spots)
+        if lat is not None and lon is not None:
+            nearest = await spatial_index.nearest(lat, lon, k=1)
+            if not nearest:
+                raise HTTPException(status_code=404, detail="No kitespots found")
+            nearest_spot = KitespotSuggestion(**nearest[0][0])
+        else:
+            # Without a location there is no nearest spot, so pick one at random
+            snapshot = await catalogue_snapshot.get()
+            if not len(snapshot):
+                raise HTTPException(status_code=404, detail="No kitespots found")
+            nearest_spot = KitespotSuggestion(**random.choice(snapshot.spots))
         
         # Generate current conditions
         wind_speed = round(random.uniform(8, 25), 1)
@@ -368,6 +670,8 @@ async def get_current_conditions():
                 "id": nearest_spot.id
             }
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching current conditions: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching current conditions: {str(e)}")
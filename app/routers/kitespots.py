@@ -1,35 +1,45 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
 from ..models.kitespot import KiteSpot
-from ..services.kitespot_service import KiteSpotService
+from ..services.kitespot_service import get_kitespot_service
+from ..utils.responses import trusted
 
 router = APIRouter(prefix="/api/kitespots", tags=["kitespots"])
-kitespot_service = KiteSpotService()
+kitespot_service = get_kitespot_service()
 
 @router.get("/", response_model=List[KiteSpot])
 async def get_kitespots():
     """Get all kitespots."""
-    return kitespot_service.get_all_spots()
+    return trusted(await kitespot_service.get_all_spots())
+
+@router.get("/search", response_model=List[KiteSpot])
+async def search_kitespots(
+    country: Optional[str] = Query(None),
+    difficulty: Optional[str] = Query(None),
+    water_type: Optional[str] = Query(None)
+):
+    """Get all kitespots matching every given filter (case-insensitive)."""
+    return trusted(await kitespot_service.search(country=country, difficulty=difficulty, water_type=water_type))
 
 @router.get("/{spot_id}", response_model=KiteSpot)
 async def get_kitespot_by_id(spot_id: str):
     """Get a specific kitespot by ID."""
-    spot = kitespot_service.get_spot_by_id(spot_id)
+    spot = await kitespot_service.get_spot_by_id(spot_id)
     if not spot:
         raise HTTPException(status_code=404, detail="Kitespot not found")
-    return spot
+    return trusted(spot)
 
 @router.get("/country/{country}", response_model=List[KiteSpot])
 async def get_spots_by_country(country: str):
     """Get all kitespots in a specific country."""
-    return kitespot_service.get_spots_by_country(country)
+    return trusted(await kitespot_service.get_spots_by_country(country))
 
 @router.get("/difficulty/{difficulty}", response_model=List[KiteSpot])
 async def get_spots_by_difficulty(difficulty: str):
     """Get all kitespots with a specific difficulty level."""
-    return kitespot_service.get_spots_by_difficulty(difficulty)
+    return trusted(await kitespot_service.get_spots_by_difficulty(difficulty))
 
 @router.get("/water-type/{water_type}", response_model=List[KiteSpot])
 async def get_spots_by_water_type(water_type: str):
     """Get all kitespots with a specific water type."""
-    return kitespot_service.get_spots_by_water_type(water_type)
\ No newline at end of file
+    return trusted(await kitespot_service.get_spots_by_water_type(water_type))
\ No newline at end of file
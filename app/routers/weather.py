@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Query, HTTPException
 from typing import List, Optional
-from ..services.weather_service import WeatherService
+from ..services.weather_service import get_weather_service
+from ..services.forecast_prefetcher import get_forecast_prefetcher
 from ..models.weather import WeatherResponse, BatchWeatherResponse
 from ..config import get_settings
+from ..utils.responses import trusted
 
 router = APIRouter(prefix="/api/weather", tags=["weather"])
-weather_service = WeatherService()
+weather_service = get_weather_service()
 
 @router.get("/realtime", response_model=WeatherResponse)
 async def get_realtime_weather(
@@ -15,12 +17,12 @@ async def get_realtime_weather(
 ):
     """Get realtime weather data for a location."""
     try:
-        return await weather_service.get_realtime_weather(
+        return trusted(await weather_service.get_realtime_weather(
             lat, 
             lon, 
             settings.tomorrow_api_key,
             settings.weatherbit_api_key
-        )
+        ))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -28,9 +30,30 @@ async def get_realtime_weather(
 async def get_batch_weather(settings = get_settings()):
     """Get weather data for multiple popular destinations."""
     try:
-        return await weather_service.get_batch_weather(
+        return trusted(await weather_service.get_batch_weather(
             settings.tomorrow_api_key,
             settings.weatherbit_api_key
-        )
+        ))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """Get hit/miss counters and memory usage of the forecast cache."""
+    return {
+        **weather_service.cache.stats(),
+        "single_flight": weather_service.flights.stats()
+    }
+
+
+@router.get("/provider-stats")
+async def get_provider_stats():
+    """Get the provider strategy and per-provider latency percentiles."""
+    return weather_service.provider_strategy.stats()
+
+
+@router.get("/prefetch-stats")
+async def get_prefetch_stats():
+    """Get the status of the background forecast prefetcher."""
+    return get_forecast_prefetcher().stats()
@@ -0,0 +1,137 @@
+import io
+import os
+import csv
+import time
+from typing import AsyncIterator, List, Optional
+from .kitespot_repository import KitespotRepository, get_kitespot_repository
+from .weather_service import WeatherService, get_weather_service
+from .catalogue_snapshot import spot_details, spot_conditions, conditions_bucket
+from .forecast_store import to_start_epoch
+from ..utils.responses import dumps
+
+# Spots read, enriched and written per step of an export
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+CSV_COLUMNS = [
+    "id", "name", "location", "coordinates", "difficulty", "water_type", "description", "image_url",
+    "rating", "review_count", "facilities", "hazards",
+    "wind_speed", "wind_direction", "temperature", "gust", "conditions_source",
+]
+
+
+def current_conditions(wind_data: dict, now: float) -> Optional[dict]:
+    """The hour of an hourly forecast that contains `now`, or None if it is not covered."""
+    if not wind_data or "error" in wind_data or not wind_data.get("time"):
+        return None
+    try:
+        start, _ = to_start_epoch(wind_data)
+    except ValueError:
+        return None
+    index = int((now - start) // 3600)
+    if not 0 <= index < len(wind_data["time"]):
+        return None
+
+    def value(name):
+        values = wind_data.get(name) or []
+        return values[index] if index < len(values) else None
+
+    wind_speed, wind_direction = value("wind_speed"), value("wind_direction")
+    if wind_speed is None or wind_direction is None:
+        return None
+    temperature, gust = value("temperature"), value("gust")
+    return {
+        "wind_speed": round(wind_speed, 1),
+        "wind_direction": int(wind_direction),
+        "temperature": round(temperature, 1) if temperature is not None else None,
+        "gust": round(gust, 1) if gust is not None else None,
+        "conditions_source": wind_data.get("source", "ECMWF"),
+    }
+
+
+async def attach_conditions(records: List[dict], mode: str, weather_service: WeatherService) -> None:
+    """
+    Add current conditions to spot records, as built by spot_details(), in place.
+
+    Forecasts for all records are looked up together: from the weather cache
+    for "cached", or with one get_wind_data_batch call for "live", which
+    also fetches the missing ones upstream. Records without a forecast get
+    the simulated conditions the listings show.
+
+    The single spot, batch and export endpoints all go through here, so
+    they report the same conditions for a spot.
+    """
+    located = [i for i, record in enumerate(records) if record['coordinates']]
+    locations = [tuple(float(value) for value in records[i]['coordinates'].split(",")) for i in located]
+    if mode == "live":
+        forecasts = await weather_service.get_wind_data_batch(locations) if locations else []
+    else:
+        forecasts = [weather_service.peek_wind_data(lat, lon) for lat, lon in locations]
+
+    now = time.time()
+    found: List[Optional[dict]] = [None] * len(records)
+    for i, wind_data in zip(located, forecasts):
+        found[i] = current_conditions(wind_data, now)
+
+    bucket = conditions_bucket(now)
+    for record, current in zip(records, found):
+        record.update(current or {**spot_conditions(record['id'], bucket), "conditions_source": "simulated"})
+
+
+class CatalogueExporter:
+    """
+    Streams the whole catalogue with conditions, one batch at a time.
+
+    Rows come from a single open database cursor, conditions are looked up
+    for a whole batch at once, and each batch is encoded and handed to the
+    response before the next one is read, so memory use does not grow with
+    the size of the catalogue.
+    """
+
+    def __init__(self, repository: Optional[KitespotRepository] = None,
+                 weather_service: Optional[WeatherService] = None,
+                 batch_size: int = EXPORT_BATCH_SIZE):
+        self.repository = repository or get_kitespot_repository()
+        self.weather_service = weather_service or get_weather_service()
+        self.batch_size = batch_size
+
+    async def batches(self, conditions: str = "cached") -> AsyncIterator[List[dict]]:
+        """
+        Yield export records, in id order, one batch at a time.
+
+        :param conditions: "none", "cached" or "live", see attach_conditions()
+        """
+        async for rows in self.repository.stream_all_spots(self.batch_size):
+            records = [spot_details(row) for row in rows]
+            if conditions != "none":
+                await attach_conditions(records, conditions, self.weather_service)
+            yield records
+
+    async def to_ndjson(self, conditions: str = "cached") -> AsyncIterator[bytes]:
+        """One JSON object per line."""
+        async for records in self.batches(conditions):
+            yield b"".join(dumps(record) + b"\n" for record in records)
+
+    async def to_csv(self, conditions: str = "cached") -> AsyncIterator[bytes]:
+        """CSV with a header row; list fields are joined with semicolons."""
+        columns = CSV_COLUMNS if conditions != "none" else CSV_COLUMNS[:CSV_COLUMNS.index("wind_speed")]
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        async for records in self.batches(conditions):
+            for record in records:
+                writer.writerow({
+                    **record,
+                    "facilities": ";".join(record['facilities']),
+                    "hazards": ";".join(record['hazards']),
+                })
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+
+# Create a global catalogue exporter
+catalogue_exporter = CatalogueExporter()
+
+# Function to get the catalogue exporter
+def get_catalogue_exporter() -> CatalogueExporter:
+    return catalogue_exporter
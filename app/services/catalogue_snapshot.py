@@ -0,0 +1,114 @@
+import os
+import time
+import random
+import hashlib
+from typing import Dict, List, NamedTuple, Optional
+from .versioned_index import VersionedIndex
+from ..utils.responses import dumps
+
+# Simulated conditions stay the same for this many seconds, so responses
+# (and their ETags) only change when the data or the time bucket does
+CONDITIONS_TTL = int(os.getenv("CATALOGUE_CONDITIONS_TTL", "600"))
+
+# Number of spots in the /api/spots listing and the featured selection
+LISTING_SIZE = 50
+FEATURED_SIZE = 3
+
+FACILITIES = ["Parking", "Rentals", "Schools", "Restaurants", "Showers", "Toilets", "Accommodation"]
+HAZARDS = ["Strong currents", "Shallow areas", "Rocks", "Boat traffic", "Jellyfish"]
+
+
+class SerializedView(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def serialize_json(value) -> SerializedView:
+    body = dumps(value)
+    return SerializedView(body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+
+
+def spot_details(spot: dict) -> dict:
+    """
+    Static, presentational fields of a spot.
+
+    Rating, reviews, facilities and hazards are simulated, seeded by the
+    spot ID so every worker and every rebuild agrees on them.
+    """
+    rng = random.Random(spot['id'])
+    water_type = spot['water_type'].lower() if spot['water_type'] else 'various'
+    difficulty = spot['difficulty'].lower() if spot['difficulty'] else 'intermediate'
+    return {
+        "id": spot['id'],
+        "name": spot['name'],
+        "location": f"{spot['location']}, {spot['country']}",
+        "coordinates": f"{spot['latitude']},{spot['longitude']}" if spot['latitude'] and spot['longitude'] else None,
+        "difficulty": spot['difficulty'] or "Intermediate",
+        "water_type": spot['water_type'] or "Flat",
+        "description": f"{spot['name']} is a popular kitesurfing spot located in {spot['location']}, {spot['country']}. "
+                       f"It features {water_type} water conditions and is suitable for {difficulty} riders.",
+        "image_url": f"/placeholder.svg?height=400&width=600&text={spot['name']}",
+        "rating": round(rng.uniform(3.5, 5.0), 1),
+        "review_count": rng.randint(10, 200),
+        "facilities": rng.sample(FACILITIES, rng.randint(2, 5)),
+        "hazards": rng.sample(HAZARDS, rng.randint(0, 3)),
+    }
+
+
+def spot_conditions(spot_id: int, bucket: int) -> dict:
+    """Simulated current conditions of a spot, fixed within a time bucket."""
+    rng = random.Random(f"{spot_id}:{bucket}")
+    wind_speed = round(rng.uniform(8, 25), 1)
+    return {
+        "wind_speed": wind_speed,
+        "wind_direction": rng.randint(0, 359),
+        "temperature": round(rng.uniform(15, 30), 1),
+        "gust": round(wind_speed * rng.uniform(1.1, 1.4), 1),
+    }
+
+
+def conditions_bucket(now: Optional[float] = None) -> int:
+    return int((time.time() if now is None else now) // CONDITIONS_TTL)
+
+
+class _SnapshotData:
+    """Immutable view of the catalogue with its listings serialized up front."""
+
+    def __init__(self, rows: List[dict], bucket: int):
+        self.bucket = bucket
+        self.spots = [{**spot_details(row), **spot_conditions(row['id'], bucket)} for row in rows]
+        self.by_id: Dict[int, dict] = {spot['id']: spot for spot in self.spots}
+        self.listing = serialize_json(self.spots[:LISTING_SIZE])
+        self.featured = serialize_json(self.spots[:FEATURED_SIZE])
+
+    def __len__(self):
+        return len(self.spots)
+
+
+class CatalogueSnapshot(VersionedIndex[_SnapshotData]):
+    """
+    The spot catalogue with simulated conditions, built once and shared.
+
+    Rebuilt in a worker thread when the database files change (for example
+    after scripts/import_kitespots.py) or when the conditions time bucket
+    rolls over. Readers always see one complete snapshot.
+    """
+
+    name = "catalogue snapshot"
+
+    async def _load(self) -> List[dict]:
+        return await self.repository.list_all_spots()
+
+    def _build(self, rows: List[dict], bucket: int) -> _SnapshotData:
+        return _SnapshotData(rows, bucket)
+
+    def _build_key(self) -> int:
+        return conditions_bucket()
+
+
+# Create a global catalogue snapshot
+catalogue_snapshot = CatalogueSnapshot()
+
+# Function to get the catalogue snapshot
+def get_catalogue_snapshot() -> CatalogueSnapshot:
+    return catalogue_snapshot
@@ -0,0 +1,66 @@
+import os
+import logging
+import importlib
+import threading
+from typing import Any, Dict, Tuple
+from ..utils.startup_report import get_startup_report
+
+logger = logging.getLogger(__name__)
+
+# "ecmwf" uses the Open-Meteo API, "neuralgcm" runs the model in this
+# process and "neuralgcm-worker" asks a separate model worker process,
+# deployed as its own service (see app/algos/model_worker.py).
+# The older USE_NEURALGCM / NEURALGCM_WORKER_ADDRESS switches still work.
+def _configured_backend() -> str:
+    backend = os.getenv("FORECAST_BACKEND")
+    if backend:
+        return backend.lower()
+    if os.getenv("USE_NEURALGCM", "false").lower() == "true":
+        return "neuralgcm-worker" if os.getenv("NEURALGCM_WORKER_ADDRESS") else "neuralgcm"
+    return "ecmwf"
+
+FORECAST_BACKEND = _configured_backend()
+
+# Backend name -> (module, class); modules are only imported when first used
+BACKENDS: Dict[str, Tuple[str, str]] = {
+    "ecmwf": ("..algos.ecmwf_client", "ECMWFClient"),
+    "neuralgcm": ("..algos.neuralgcm_wrapper", "NeuralGCMWrapper"),
+    "neuralgcm-worker": ("..algos.model_worker", "ModelWorkerClient"),
+}
+
+
+class BackendRegistry:
+    """
+    Imports and constructs forecast backends on first use.
+
+    Import and construction times go to the startup report, so a slow
+    checkpoint load can be told apart from a slow import.
+    """
+
+    def __init__(self, backends: Dict[str, Tuple[str, str]] = BACKENDS):
+        self.backends = dict(backends)
+        self._lock = threading.Lock()
+
+    def register(self, name: str, module: str, attribute: str):
+        self.backends[name] = (module, attribute)
+
+    def load(self, name: str, *args, **kwargs) -> Any:
+        if name not in self.backends:
+            raise ValueError(f"Unknown forecast backend '{name}', expected one of {sorted(self.backends)}")
+        module_name, attribute = self.backends[name]
+        report = get_startup_report()
+
+        # Model construction is expensive, so never let two threads do it at once
+        with self._lock:
+            with report.measure(name, "import"):
+                backend_class = getattr(importlib.import_module(module_name, __package__), attribute)
+            with report.measure(name, "init"):
+                return backend_class(*args, **kwargs)
+
+
+# Create a global backend registry
+backend_registry = BackendRegistry()
+
+# Function to get the backend registry
+def get_backend_registry() -> BackendRegistry:
+    return backend_registry
@@ -0,0 +1,144 @@
+import os
+import sys
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Cache entries are shared by every request inside the same grid cell
+CACHE_GRID_DEG = float(os.getenv("WEATHER_CACHE_GRID_DEG", "0.05"))
+CACHE_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_BYTES = int(os.getenv("WEATHER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Seconds each provider's data stays fresh, overridable with WEATHER_CACHE_TTL_<PROVIDER>
+DEFAULT_TTLS = {
+    "tomorrow": 300,
+    "weatherbit": 300,
+    "ecmwf": 1800,
+    "neuralgcm": 3600,
+}
+DEFAULT_TTL = 300
+
+CacheKey = Tuple[str, int, int]
+
+
+def estimate_size(value: Any) -> int:
+    """Rough size in bytes of a cached value and everything it references."""
+    if isinstance(value, BaseModel):
+        return sys.getsizeof(value) + estimate_size(value.__dict__)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k) + estimate_size(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return sys.getsizeof(value) + nbytes
+    return sys.getsizeof(value)
+
+
+class ForecastCache:
+    """
+    In-memory TTL cache for upstream weather data.
+
+    Keys are a provider name plus the request location snapped to a grid,
+    so nearby requests share one entry. Entries expire after the provider's
+    TTL, and the least recently used entries are evicted once the cache
+    holds too many entries or too many bytes.
+    """
+
+    def __init__(self, grid_deg: float = CACHE_GRID_DEG, max_entries: int = CACHE_MAX_ENTRIES,
+                 max_bytes: int = CACHE_MAX_BYTES, ttls: Optional[Dict[str, float]] = None):
+        self.grid_deg = grid_deg
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS)
+        for provider in self.ttls:
+            env_ttl = os.getenv(f"WEATHER_CACHE_TTL_{provider.upper()}")
+            if env_ttl:
+                self.ttls[provider] = float(env_ttl)
+        if ttls:
+            self.ttls.update(ttls)
+
+        # key -> (expires_at, size, value), oldest first
+        self._entries: "OrderedDict[CacheKey, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._evictions = 0
+        self._expirations = 0
+
+    def key(self, provider: str, lat: float, lon: float) -> CacheKey:
+        """Snap a location to the cache grid."""
+        return provider, round(lat / self.grid_deg), round(lon / self.grid_deg)
+
+    def ttl(self, provider: str) -> float:
+        return self.ttls.get(provider, DEFAULT_TTL)
+
+    def get(self, provider: str, lat: float, lon: float) -> Optional[Any]:
+        """Get a fresh cached value, or None on a miss."""
+        key = self.key(provider, lat, lon)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, size, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits[provider] = self._hits.get(provider, 0) + 1
+                return value
+            self._remove(key)
+            self._expirations += 1
+        self._misses[provider] = self._misses.get(provider, 0) + 1
+        return None
+
+    def set(self, provider: str, lat: float, lon: float, value: Any):
+        """Store a value for the provider's TTL, evicting old entries if needed."""
+        key = self.key(provider, lat, lon)
+        if key in self._entries:
+            self._remove(key)
+        size = estimate_size(value)
+        self._entries[key] = (time.monotonic() + self.ttl(provider), size, value)
+        self._bytes += size
+
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._evictions += 1
+
+    def _remove(self, key: CacheKey):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters and memory usage."""
+        hits = sum(self._hits.values())
+        misses = sum(self._misses.values())
+        lookups = hits + misses
+        providers = sorted(set(self._hits) | set(self._misses))
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "grid_deg": self.grid_deg,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+            "providers": {
+                provider: {
+                    "hits": self._hits.get(provider, 0),
+                    "misses": self._misses.get(provider, 0),
+                    "ttl": self.ttl(provider),
+                }
+                for provider in providers
+            },
+        }
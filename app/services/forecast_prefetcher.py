@@ -0,0 +1,227 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import numpy as np
+from collections import Counter
+from datetime import datetime, timezone
+from typing import List, Optional
+from .forecast_store import FORECAST_STORE_DIR, ForecastStore, VARIABLES, get_forecast_store, to_start_epoch
+from .kitespot_repository import KitespotRepository, get_kitespot_repository
+from .weather_service import WeatherService, get_weather_service
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, where every worker prefetches
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_ENABLED = os.getenv("FORECAST_PREFETCH_ENABLED", "true").lower() == "true"
+PREFETCH_INTERVAL = float(os.getenv("FORECAST_PREFETCH_INTERVAL", "900"))  # Seconds between full refreshes
+PREFETCH_RATE = float(os.getenv("FORECAST_PREFETCH_RATE", "1"))            # Upstream requests per second
+PREFETCH_BURST = int(os.getenv("FORECAST_PREFETCH_BURST", "4"))
+PREFETCH_BATCH_SIZE = 100   # Spots per multi-location request
+PREFETCH_JITTER = 0.1       # Fraction of the interval added or removed at random
+STARTUP_DELAY = 5.0         # Let the server start answering before the first refresh
+
+# Only the process holding this lock prefetches; the others retry now and then
+# so one of them takes over when that process exits
+PREFETCH_LOCK_PATH = os.getenv("FORECAST_PREFETCH_LOCK", os.path.join(FORECAST_STORE_DIR, ".prefetch.lock"))
+LEADER_RETRY_INTERVAL = 60.0
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    async def acquire(self, tokens: float = 1.0):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return
+            await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class ForecastPrefetcher:
+    """
+    Keeps ECMWF forecasts for the whole spot catalogue warm in the cache.
+
+    Every interval (with jitter) it refreshes all spots that have coordinates,
+    most requested spots first, in multi-location batches. Every upstream
+    request, retries included, takes a token from a token bucket so the
+    upstream rate limit is respected.
+
+    Each uvicorn worker starts one, but only the worker holding the prefetch
+    file lock refreshes, so the rate limit is not multiplied by the number
+    of workers. The other workers serve the runs it writes to the forecast
+    store. Popularity is counted per worker, so only the requests the
+    prefetching worker served affect the order.
+    """
+
+    def __init__(self, weather_service: Optional[WeatherService] = None,
+                 repository: Optional[KitespotRepository] = None,
+                 store: Optional[ForecastStore] = None,
+                 interval: float = PREFETCH_INTERVAL, rate: float = PREFETCH_RATE,
+                 burst: int = PREFETCH_BURST, batch_size: int = PREFETCH_BATCH_SIZE,
+                 lock_path: str = PREFETCH_LOCK_PATH):
+        self.weather_service = weather_service or get_weather_service()
+        self.repository = repository or get_kitespot_repository()
+        self.store = store or get_forecast_store()
+        self.interval = interval
+        self.batch_size = batch_size
+        self.bucket = TokenBucket(rate, burst)
+        self.lock_path = lock_path
+        self._lock_file = None
+        self.popularity: Counter = Counter()
+        self._task: Optional[asyncio.Task] = None
+        self.last_run: Optional[dict] = None
+
+    def record_request(self, spot_id: int):
+        """Count a user request for a spot so it is refreshed earlier."""
+        self.popularity[spot_id] += 1
+
+    def _prioritize(self, spots: List[dict]) -> List[dict]:
+        return sorted(spots, key=lambda spot: (-self.popularity[spot["id"]], spot["id"]))
+
+    async def refresh_all(self) -> dict:
+        """Refresh the forecast of every spot once."""
+        started = time.monotonic()
+        fetched_at = datetime.now(timezone.utc)
+        # Ask before fetching, so the data is at least as new as this run
+        await self.bucket.acquire()
+        run_time = await self.weather_service.model_run_time()
+        spots = self._prioritize(await self.repository.list_spot_coordinates())
+
+        refreshed = failed = 0
+        fetched = []
+        for i in range(0, len(spots), self.batch_size):
+            batch = spots[i:i + self.batch_size]
+            results = await self.weather_service.get_wind_data_batch(
+                [(spot["latitude"], spot["longitude"]) for spot in batch],
+                refresh=True,
+                before_request=self.bucket.acquire
+            )
+            for spot, result in zip(batch, results):
+                if "error" in result:
+                    failed += 1
+                else:
+                    refreshed += 1
+                    fetched.append((spot["id"], result))
+
+        if fetched:
+            try:
+                # Without a model run time, fall back to the hour of the fetch
+                run_time = run_time or fetched_at.replace(minute=0, second=0, microsecond=0)
+                await asyncio.to_thread(self._store_run, run_time, fetched_at, fetched)
+            except Exception as e:
+                logger.error(f"Failed to store forecast run: {str(e)}")
+
+        # Let old popularity fade so the ranking follows current demand
+        for spot_id in list(self.popularity):
+            self.popularity[spot_id] //= 2
+            if not self.popularity[spot_id]:
+                del self.popularity[spot_id]
+
+        self.last_run = {
+            "finished_at": time.time(),
+            "duration_s": round(time.monotonic() - started, 2),
+            "spots": len(spots),
+            "refreshed": refreshed,
+            "failed": failed,
+        }
+        logger.info(f"Prefetched forecasts for {refreshed}/{len(spots)} spots in {self.last_run['duration_s']}s")
+        return self.last_run
+
+    def _store_run(self, run_time: datetime, fetched_at: datetime, fetched: List[tuple]):
+        """Write the refreshed forecasts to the forecast store as one run."""
+        fetched = [(spot_id, data) for spot_id, data in fetched if data.get("time")]
+        hours = max(len(data["time"]) for _, data in fetched) if fetched else 0
+        columns = {name: np.full((len(fetched), hours), np.nan, dtype=np.float32) for name in VARIABLES}
+        starts, offsets = [], []
+        for row, (_, data) in enumerate(fetched):
+            start, offset = to_start_epoch(data)
+            starts.append(start)
+            offsets.append(offset)
+            for name in VARIABLES:
+                values = data.get(name) or []
+                columns[name][row, :len(values)] = [np.nan if value is None else value for value in values]
+        self.store.write_run(run_time, [spot_id for spot_id, _ in fetched], starts, offsets, columns,
+                             fetched_at=fetched_at)
+
+    def _try_lead(self) -> bool:
+        """Take the prefetch lock unless another process holds it."""
+        if fcntl is None or self._lock_file is not None:
+            return True
+        os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _release(self):
+        if self._lock_file is not None:
+            # Closing the file releases the lock
+            self._lock_file.close()
+            self._lock_file = None
+
+    async def _run(self):
+        await asyncio.sleep(STARTUP_DELAY * random.uniform(1, 2))
+        while not self._try_lead():
+            await asyncio.sleep(LEADER_RETRY_INTERVAL * random.uniform(1, 2))
+        logger.info(f"Prefetching forecasts in process {os.getpid()}")
+        while True:
+            try:
+                await self.refresh_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Forecast prefetch failed: {str(e)}")
+            jitter = random.uniform(-PREFETCH_JITTER, PREFETCH_JITTER)
+            await asyncio.sleep(self.interval * (1 + jitter))
+
+    def start(self):
+        """Start refreshing in the background on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._release()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": PREFETCH_ENABLED,
+            "running": self._task is not None and not self._task.done(),
+            "leader": self._lock_file is not None,
+            "interval_s": self.interval,
+            "tracked_spots": len(self.popularity),
+            "last_run": self.last_run,
+        }
+
+
+# Create a global prefetcher
+forecast_prefetcher = ForecastPrefetcher()
+
+# Function to get the prefetcher
+def get_forecast_prefetcher() -> ForecastPrefetcher:
+    return forecast_prefetcher
@@ -0,0 +1,296 @@
+import os
+import json
+import mmap
+import struct
+import logging
+import threading
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+FORECAST_STORE_DIR = os.getenv("FORECAST_STORE_DIR", "data/forecasts")
+FORECAST_STORE_RETENTION = int(os.getenv("FORECAST_STORE_RETENTION", "28"))  # Runs kept on disk
+FORECAST_STORE_MAX_AGE = float(os.getenv("FORECAST_STORE_MAX_AGE", "43200"))  # Seconds after model initialisation a run is served for
+
+VARIABLES = ("wind_speed", "wind_direction", "gust", "temperature")
+
+# File layout: magic, header length, JSON header, then 64-byte aligned
+# columns: start epochs (int64, per spot), UTC offsets (int32, per spot)
+# and the values (float32, variables x spots x hours).
+MAGIC = b"KFS1"
+ALIGNMENT = 64
+RUN_TIME_FORMAT = "%Y%m%dT%H%M"
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class ForecastRun:
+    """
+    One model run, memory-mapped read-only.
+
+    Arrays handed out are views into the mapping, so reading a spot copies
+    nothing, and every process that maps the same file shares its pages.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._stat = os.stat(path)
+
+        magic, header_len = struct.unpack_from("<4sI", self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Not a forecast store file: {path}")
+        header = json.loads(bytes(self._mmap[8:8 + header_len]))
+
+        self.run_time = datetime.fromisoformat(header["run_time"])
+        self.fetched_at = datetime.fromisoformat(header["fetched_at"]) if header.get("fetched_at") else None
+        self.variables: List[str] = header["variables"]
+        self.hours: int = header["hours"]
+        spot_ids = header["spot_ids"]
+        n_spots = len(spot_ids)
+        self._rows = {spot_id: row for row, spot_id in enumerate(spot_ids)}
+
+        self.start_epochs = np.frombuffer(self._mmap, dtype="<i8", count=n_spots, offset=header["starts_offset"])
+        self.utc_offsets = np.frombuffer(self._mmap, dtype="<i4", count=n_spots, offset=header["offsets_offset"])
+        self.values = np.frombuffer(
+            self._mmap, dtype="<f4", count=len(self.variables) * n_spots * self.hours,
+            offset=header["values_offset"]
+        ).reshape(len(self.variables), n_spots, self.hours)
+
+    def is_stale(self) -> bool:
+        """True if the file was replaced since it was mapped."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return True
+        return (stat.st_ino, stat.st_mtime_ns) != (self._stat.st_ino, self._stat.st_mtime_ns)
+
+    @property
+    def spot_ids(self) -> List[int]:
+        return list(self._rows)
+
+    def __contains__(self, spot_id: int) -> bool:
+        return spot_id in self._rows
+
+    def get(self, spot_id: int) -> Optional[dict]:
+        """Hourly arrays for one spot, or None if the run does not cover it."""
+        row = self._rows.get(spot_id)
+        if row is None:
+            return None
+        data = {name: self.values[i, row] for i, name in enumerate(self.variables)}
+        data["start"] = datetime.fromtimestamp(int(self.start_epochs[row]), tz=timezone.utc)
+        data["utc_offset_seconds"] = int(self.utc_offsets[row])
+        data["run_time"] = self.run_time
+        return data
+
+    def close(self):
+        # Views may still reference the buffer; let garbage collection unmap it then
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+
+class ForecastStore:
+    """
+    On-disk store of hourly forecasts, one immutable columnar file per model run.
+
+    Runs are keyed by the upstream model's initialisation time, written
+    atomically (temporary file + rename; a later fetch of the same run
+    replaces it), kept for FORECAST_STORE_RETENTION runs so they can be
+    compared over time, and read back through memory maps.
+    """
+
+    def __init__(self, directory: str = FORECAST_STORE_DIR, retention: int = FORECAST_STORE_RETENTION):
+        self.directory = directory
+        self.retention = retention
+        self._runs: Dict[str, ForecastRun] = {}
+        self._lock = threading.Lock()
+        # Run list and the directory mtime it was read at
+        self._run_list: Optional[Tuple[int, List[datetime]]] = None
+
+    def _path(self, run_time: datetime) -> str:
+        return os.path.join(self.directory, f"run-{run_time.strftime(RUN_TIME_FORMAT)}.kfs")
+
+    def list_runs(self) -> List[datetime]:
+        """
+        Run times on disk, oldest first.
+
+        Writes and prunes rename or remove files, which changes the
+        directory's mtime, so the listing is only re-read when that changed.
+        """
+        try:
+            mtime = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        cached = self._run_list
+        if cached is not None and cached[0] == mtime:
+            return list(cached[1])
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        runs = []
+        for name in names:
+            if name.startswith("run-") and name.endswith(".kfs"):
+                try:
+                    runs.append(datetime.strptime(name[4:-4], RUN_TIME_FORMAT).replace(tzinfo=timezone.utc))
+                except ValueError:
+                    continue
+        runs.sort()
+        self._run_list = (mtime, runs)
+        return list(runs)
+
+    def write_run(self, run_time: datetime, spot_ids: Sequence[int], start_epochs: Sequence[int],
+                  utc_offsets: Sequence[int], columns: Dict[str, np.ndarray],
+                  fetched_at: Optional[datetime] = None):
+        """
+        Write one model run.
+
+        :param run_time: Initialisation time of the upstream model run (UTC)
+        :param spot_ids: Spot ID of every row
+        :param start_epochs: UTC epoch seconds of each spot's first hour
+        :param utc_offsets: Each spot's UTC offset in seconds, for local times
+        :param columns: Variable name -> float array of shape (spots, hours)
+        :param fetched_at: When the data was fetched, for reference
+        """
+        run_time = run_time.astimezone(timezone.utc).replace(second=0, microsecond=0)
+        n_spots = len(spot_ids)
+        hours = max((np.shape(columns[name])[1] for name in columns), default=0)
+
+        values = np.full((len(VARIABLES), n_spots, hours), np.nan, dtype="<f4")
+        for i, name in enumerate(VARIABLES):
+            if name in columns:
+                column = np.asarray(columns[name], dtype="<f4")
+                values[i, :, :column.shape[1]] = column
+
+        header = {
+            "version": 1,
+            "run_time": run_time.isoformat(),
+            "fetched_at": fetched_at.astimezone(timezone.utc).isoformat() if fetched_at else None,
+            "variables": list(VARIABLES),
+            "hours": hours,
+            "spot_ids": [int(spot_id) for spot_id in spot_ids],
+        }
+        # Offsets depend on the header length, so size the header with placeholders first
+        for key in ("starts_offset", "offsets_offset", "values_offset"):
+            header[key] = 0
+        header_len = len(json.dumps(header).encode()) + 64
+        header["starts_offset"] = _align(8 + header_len)
+        header["offsets_offset"] = _align(header["starts_offset"] + 8 * n_spots)
+        header["values_offset"] = _align(header["offsets_offset"] + 4 * n_spots)
+        header_bytes = json.dumps(header).encode().ljust(header_len)
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(run_time)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(struct.pack("<4sI", MAGIC, header_len))
+            f.write(header_bytes)
+            f.seek(header["starts_offset"])
+            f.write(np.asarray(start_epochs, dtype="<i8").tobytes())
+            f.seek(header["offsets_offset"])
+            f.write(np.asarray(utc_offsets, dtype="<i4").tobytes())
+            f.seek(header["values_offset"])
+            f.write(values.tobytes())
+        os.replace(tmp_path, path)
+        logger.info(f"Stored forecast run {run_time.isoformat()} for {n_spots} spots")
+
+        self._prune()
+
+    def _prune(self):
+        runs = self.list_runs()
+        for run_time in runs[:max(len(runs) - self.retention, 0)]:
+            try:
+                os.remove(self._path(run_time))
+            except FileNotFoundError:
+                pass
+
+    def open_run(self, run_time: Optional[datetime] = None) -> Optional[ForecastRun]:
+        """Map a run (the latest one by default), reusing existing mappings."""
+        if run_time is None:
+            runs = self.list_runs()
+            if not runs:
+                return None
+            run_time = runs[-1]
+        path = self._path(run_time)
+
+        with self._lock:
+            run = self._runs.get(path)
+            if run is not None and not run.is_stale():
+                return run
+            if run is not None:
+                run.close()
+                del self._runs[path]
+            if not os.path.exists(path):
+                return None
+            run = ForecastRun(path)
+            self._runs[path] = run
+            # Forget mappings of runs that were pruned
+            for stale_path in [p for p, r in self._runs.items() if r.is_stale()]:
+                self._runs.pop(stale_path).close()
+            return run
+
+    def read(self, spot_id: int, run_time: Optional[datetime] = None) -> Optional[dict]:
+        """Hourly arrays for a spot from one run (the latest one by default)."""
+        run = self.open_run(run_time)
+        return run.get(spot_id) if run else None
+
+    def latest(self, spot_id: int, max_age: float = FORECAST_STORE_MAX_AGE) -> Optional[dict]:
+        """
+        The spot's forecast from the newest run that covers it, as long as
+        that run was initialised at most `max_age` seconds ago.
+        """
+        now = datetime.now(timezone.utc)
+        for run_time in reversed(self.list_runs()):
+            if (now - run_time).total_seconds() > max_age:
+                return None
+            data = self.read(spot_id, run_time)
+            if data is not None:
+                return data
+        return None
+
+    def history(self, spot_id: int, limit: int = 8) -> List[dict]:
+        """The spot's forecasts from the most recent runs, newest first."""
+        result = []
+        for run_time in reversed(self.list_runs()[-limit:]):
+            data = self.read(spot_id, run_time)
+            if data is not None:
+                result.append(data)
+        return result
+
+
+def hourly_times(data: dict) -> List[str]:
+    """Local ISO timestamps for a spot's hourly arrays, in the ECMWF response format."""
+    start = data["start"] + timedelta(seconds=data["utc_offset_seconds"])
+    hours = len(data["wind_speed"])
+    return [(start + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M") for i in range(hours)]
+
+
+def to_wind_data(data: dict) -> dict:
+    """Convert stored arrays back to the ECMWF client's response format."""
+    wind_data = {"time": hourly_times(data), "utc_offset_seconds": data["utc_offset_seconds"]}
+    for name in VARIABLES:
+        values = data[name]
+        wind_data[name] = [None if value != value else value for value in values.tolist()]
+    return wind_data
+
+
+def to_start_epoch(wind_data: dict) -> Tuple[int, int]:
+    """UTC epoch of the first hour and the UTC offset of an ECMWF response."""
+    offset = int(wind_data.get("utc_offset_seconds") or 0)
+    first = datetime.fromisoformat(wind_data["time"][0]).replace(tzinfo=timezone.utc)
+    return int(first.timestamp()) - offset, offset
+
+
+# Create a global forecast store
+forecast_store = ForecastStore()
+
+# Function to get the forecast store
+def get_forecast_store() -> ForecastStore:
+    return forecast_store
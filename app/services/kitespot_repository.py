@@ -0,0 +1,315 @@
+import os
+import re
+import json
+import asyncio
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Database path
+DB_PATH = os.getenv("KITESPOTS_DB_PATH", "data/kitespots.db")
+
+# Connection tuning
+POOL_SIZE = int(os.getenv("KITESPOTS_DB_POOL_SIZE", "4"))
+MMAP_SIZE = 256 * 1024 * 1024  # Map the whole catalogue into memory
+CACHE_SIZE_KIB = 16 * 1024     # Page cache per connection
+STATEMENT_CACHE_SIZE = 128     # Prepared statements kept per connection
+STREAM_BATCH_SIZE = 500        # Rows per fetchmany when streaming
+
+# Name matches rank first, then location matches, then bm25 relevance
+# weighted towards the name column.
+SELECT_SUGGESTIONS_FTS = '''
+SELECT k.id, k.name, k.location, k.country
+FROM kitespots_fts
+JOIN kitespots k ON k.id = kitespots_fts.rowid
+WHERE kitespots_fts MATCH ?
+ORDER BY
+    CASE
+        WHEN k.name LIKE ? THEN 1
+        WHEN k.location LIKE ? THEN 2
+        ELSE 3
+    END,
+    bm25(kitespots_fts, 10.0, 5.0, 1.0),
+    k.name
+LIMIT ?
+'''
+
+# Fallback for databases imported before the full-text index existed
+SELECT_SUGGESTIONS = '''
+SELECT id, name, location, country
+FROM kitespots
+WHERE search_text LIKE ?
+ORDER BY
+    CASE
+        WHEN name LIKE ? THEN 1
+        WHEN location LIKE ? THEN 2
+        ELSE 3
+    END,
+    name
+LIMIT ?
+'''
+
+SELECT_SUGGESTION_ROWS = '''
+SELECT id, name, location, country
+FROM kitespots
+'''
+
+SELECT_SPOT_COORDINATES = '''
+SELECT id, name, location, country, latitude, longitude
+FROM kitespots
+WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+'''
+
+SELECT_ALL_SPOTS = '''
+SELECT id, name, location, country, latitude, longitude, difficulty, water_type
+FROM kitespots
+ORDER BY id
+'''
+
+# Keyset pagination: {filters} is filled with the optional conditions below
+SELECT_SPOTS_PAGE = '''
+SELECT id, name, location, country, latitude, longitude, difficulty, water_type
+FROM kitespots
+WHERE id > ?{filters}
+ORDER BY id
+LIMIT ?
+'''
+
+PAGE_FILTERS = {
+    "country": " AND country = ? COLLATE NOCASE",
+    "difficulty": " AND difficulty = ? COLLATE NOCASE",
+    "water_type": " AND water_type = ? COLLATE NOCASE",
+}
+BBOX_FILTER = " AND latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?"
+# A box whose west edge is east of its east edge crosses the antimeridian
+BBOX_FILTER_ANTIMERIDIAN = " AND latitude BETWEEN ? AND ? AND (longitude >= ? OR longitude <= ?)"
+
+# Any number of IDs bound as a single JSON array parameter
+SELECT_SPOTS_BY_IDS = '''
+SELECT id, name, location, country, latitude, longitude, difficulty, water_type
+FROM kitespots
+WHERE id IN (SELECT value FROM json_each(?))
+'''
+
+
+class DatabaseNotFoundError(FileNotFoundError):
+    """Raised when the kitespots database file does not exist."""
+
+
+class KitespotRepository:
+    """
+    Read-only access to the kitespots SQLite database.
+
+    Queries run on a small dedicated thread pool so they never block the
+    event loop. Every worker thread keeps one long-lived, read-only
+    connection with tuned pragmas, and relies on sqlite3's per-connection
+    statement cache so the queries below are only prepared once.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, pool_size: int = POOL_SIZE):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._has_fts: Optional[bool] = None
+        self._fts_checked_version: Optional[Tuple[int, ...]] = None
+
+    def data_version(self) -> Optional[Tuple[int, ...]]:
+        """
+        Cheap fingerprint of the database files on disk.
+
+        Changes whenever the import script rewrites the catalogue, including
+        writes that are still sitting in the WAL. Returns None if the
+        database does not exist.
+        """
+        try:
+            db = os.stat(self.db_path)
+        except FileNotFoundError:
+            return None
+        try:
+            wal = os.stat(f"{self.db_path}-wal")
+            wal_version = (wal.st_mtime_ns, wal.st_size)
+        except FileNotFoundError:
+            wal_version = (0, 0)
+        return (db.st_mtime_ns, db.st_size) + wal_version
+
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open a tuned, read-only connection."""
+        if not os.path.exists(self.db_path):
+            raise DatabaseNotFoundError(f"Database file not found at {self.db_path}")
+
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only=1")
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a pooled connection for the current worker thread."""
+        conn = self._open_connection()
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def _fetch_all(self, sql: str, params: Sequence[Any]) -> List[dict]:
+        cursor = self._connection().execute(sql, params)
+        return [dict(row) for row in cursor.fetchall()]
+
+    async def _run(self, fn: Callable, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.pool_size,
+                thread_name_prefix="kitespots-db"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def fetch_all(self, sql: str, params: Sequence[Any] = ()) -> List[dict]:
+        """Run a query on the pool and return all rows as dictionaries."""
+        return await self._run(self._fetch_all, sql, params)
+
+    def _open_stream(self, sql: str, params: Sequence[Any]) -> sqlite3.Cursor:
+        # A connection of its own, so the open statement never shares a
+        # pooled connection with other queries
+        return self._open_connection().execute(sql, params)
+
+    async def stream(self, sql: str, params: Sequence[Any] = (),
+                     batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[List[dict]]:
+        """
+        Run a query and yield its rows in batches as they are read.
+
+        The cursor stays open on the database between batches, so only one
+        batch is held in memory at a time and the whole result comes from
+        one consistent read. Each fetchmany runs on the pool.
+
+        That read keeps a transaction open until the last row is read or the
+        generator is closed, and WAL checkpoints cannot complete past it, so
+        the WAL file grows during imports that overlap a slow consumer.
+        """
+        cursor = await self._run(self._open_stream, sql, params)
+        try:
+            while True:
+                rows = await self._run(cursor.fetchmany, batch_size)
+                if not rows:
+                    break
+                yield [dict(row) for row in rows]
+        finally:
+            cursor.connection.close()
+
+    @staticmethod
+    def _fts_query(q: str) -> Optional[str]:
+        """Turn free text into an FTS5 query where every word is a prefix match."""
+        tokens = re.findall(r"\w+", q.lower())
+        if not tokens:
+            return None
+        return " ".join(f'"{token}"*' for token in tokens)
+
+    def _search_suggestions(self, q: str, limit: int) -> List[dict]:
+        match = self._fts_query(q)
+        if self._has_fts is False and self.data_version() != self._fts_checked_version:
+            # The database changed since the index was found missing, so look again
+            self._has_fts = None
+        if match is not None and self._has_fts is not False:
+            try:
+                rows = self._fetch_all(SELECT_SUGGESTIONS_FTS, (match, f"{q}%", f"{q}%", limit))
+                self._has_fts = True
+                return rows
+            except sqlite3.OperationalError as e:
+                if "no such table" not in str(e):
+                    raise
+                logger.warning("Full-text index missing, re-run scripts/import_kitespots.py. Falling back to LIKE search")
+                self._has_fts = False
+                self._fts_checked_version = self.data_version()
+
+        search_term = f"%{q.lower()}%"
+        return self._fetch_all(SELECT_SUGGESTIONS, (search_term, f"{q}%", f"{q}%", limit))
+
+    async def search_suggestions(self, q: str, limit: int = 10) -> List[dict]:
+        """Find spots whose name, location or country words start with the query words."""
+        return await self._run(self._search_suggestions, q, limit)
+
+    async def list_suggestion_rows(self) -> List[dict]:
+        """Get the searchable fields of every spot."""
+        return await self.fetch_all(SELECT_SUGGESTION_ROWS)
+
+    async def list_spot_coordinates(self) -> List[dict]:
+        """Get every spot that has coordinates."""
+        return await self.fetch_all(SELECT_SPOT_COORDINATES)
+
+    async def list_all_spots(self) -> List[dict]:
+        """List every spot in the catalogue."""
+        return await self.fetch_all(SELECT_ALL_SPOTS)
+
+    async def stream_all_spots(self, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[List[dict]]:
+        """Stream every spot in id order, in batches."""
+        async for rows in self.stream(SELECT_ALL_SPOTS, batch_size=batch_size):
+            yield rows
+
+    async def list_spots_page(self, after_id: Optional[int] = None, limit: int = 50,
+                              country: Optional[str] = None, difficulty: Optional[str] = None,
+                              water_type: Optional[str] = None,
+                              bbox: Optional[Tuple[float, float, float, float]] = None) -> List[dict]:
+        """
+        List spots in id order after a cursor, with optional filters.
+
+        :param after_id: Return spots with a larger id (the previous page's last id)
+        :param bbox: (min_lat, min_lon, max_lat, max_lon)
+        """
+        filters = ""
+        params: List[Any] = [after_id if after_id is not None else -1]
+        for column, value in (("country", country), ("difficulty", difficulty), ("water_type", water_type)):
+            if value is not None:
+                filters += PAGE_FILTERS[column]
+                params.append(value)
+        if bbox is not None:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            filters += BBOX_FILTER if min_lon <= max_lon else BBOX_FILTER_ANTIMERIDIAN
+            params += [min_lat, max_lat, min_lon, max_lon]
+        params.append(limit)
+        return await self.fetch_all(SELECT_SPOTS_PAGE.format(filters=filters), params)
+
+    async def get_spots_by_ids(self, spot_ids: Sequence[int]) -> List[dict]:
+        """Get several spots with one query. Unknown IDs are skipped."""
+        return await self.fetch_all(SELECT_SPOTS_BY_IDS, (json.dumps([int(i) for i in spot_ids]),))
+
+    def close(self):
+        """Close every pooled connection and stop the worker threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections = []
+        self._local = threading.local()
+
+
+# Create a global repository object
+kitespot_repository = KitespotRepository()
+
+# Function to get the repository
+def get_kitespot_repository() -> KitespotRepository:
+    return kitespot_repository
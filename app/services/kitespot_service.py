@@ -1,87 +1,115 @@
-from typing import List, Optional
+from typing import Dict, FrozenSet, List, Optional
 from ..models.kitespot import KiteSpot, Coordinates
+from .versioned_index import VersionedIndex
+from .catalogue_snapshot import spot_details
 
-class KiteSpotService:
-    def __init__(self):
-        # Initialize with some example data
-        self.spots = [
-            KiteSpot(
-                id="tarifa",
-                name="Tarifa Beach",
-                location="Tarifa, Spain",
-                country="Spain",
-                coordinates=Coordinates(lat=36.0128, lng=-5.6012),
-                description="Tarifa is known for its strong and consistent winds, making it a paradise for kitesurfers.",
-                bestFor=["Advanced", "Intermediate"],
-                windDirection=["East", "West"],
-                waterConditions="Waves",
-                bestSeason="Summer",
-                difficulty="Advanced",
-                water_type="Wave",
-                wave_spot=True,
-                wind_reliability=0.9,
-                water_quality=0.8,
-                crowd_level=0.7,
-                overall_rating=0.85
-            ),
-            KiteSpot(
-                id="cabarete",
-                name="Cabarete",
-                location="Puerto Plata, Dominican Republic",
-                country="Dominican Republic",
-                coordinates=Coordinates(lat=19.7667, lng=-70.4167),
-                description="Cabarete offers a variety of conditions, from flat water lagoons to wave spots, suitable for all levels.",
-                bestFor=["Beginner", "Intermediate", "Advanced"],
-                windDirection=["East"],
-                waterConditions="Flat Water & Waves",
-                bestSeason="Winter",
-                difficulty="Mixed",
-                water_type="Mixed",
-                wave_spot=True,
-                flat_water=True,
-                suitable_for_beginners=True,
-                wind_reliability=0.85,
-                water_quality=0.9,
-                crowd_level=0.6,
-                overall_rating=0.9
-            ),
-            KiteSpot(
-                id="maui",
-                name="Maui",
-                location="Hawaii, USA",
-                country="USA",
-                coordinates=Coordinates(lat=20.7984, lng=-156.3319),
-                description="Maui is a world-class kitesurfing destination with consistent trade winds and warm waters.",
-                bestFor=["Intermediate", "Advanced"],
-                windDirection=["Northeast"],
-                waterConditions="Waves",
-                bestSeason="Summer",
-                difficulty="Advanced",
-                water_type="Wave",
-                wave_spot=True,
-                wind_reliability=0.95,
-                water_quality=0.9,
-                crowd_level=0.8,
-                overall_rating=0.95
-            )
+# Attributes with a secondary index, matched case-insensitively
+INDEXED_ATTRIBUTES = ("country", "difficulty", "water_type")
+
+
+def _to_kitespot(row: dict) -> KiteSpot:
+    details = spot_details(row)
+    water_type = (row['water_type'] or "").lower()
+    # Rows come from our own schema, so skip pydantic validation
+    return KiteSpot.construct(
+        id=str(row['id']),
+        name=row['name'],
+        location=details['location'],
+        country=row['country'] or "",
+        coordinates=Coordinates.construct(lat=row['latitude'], lng=row['longitude']),
+        description=details['description'],
+        bestFor=[details['difficulty']],
+        windDirection=[],
+        waterConditions=details['water_type'],
+        bestSeason="Unknown",
+        difficulty=row['difficulty'],
+        water_type=row['water_type'],
+        facilities=details['facilities'],
+        wave_spot="wave" in water_type,
+        flat_water="flat" in water_type,
+        suitable_for_beginners=(row['difficulty'] or "").lower() == "beginner",
+    )
+
+
+class _CatalogueIndex:
+    """Spots by id plus case-folded secondary indexes, built once per catalogue version."""
+
+    def __init__(self, rows: List[dict]):
+        # Spots without coordinates cannot be represented by the KiteSpot model
+        self.spots = [_to_kitespot(row) for row in rows if row['latitude'] is not None and row['longitude'] is not None]
+        self.by_id: Dict[str, KiteSpot] = {spot.id: spot for spot in self.spots}
+
+        # attribute -> case-folded value -> positions in self.spots
+        indexes: Dict[str, Dict[str, set]] = {attribute: {} for attribute in INDEXED_ATTRIBUTES}
+        for position, spot in enumerate(self.spots):
+            for attribute in INDEXED_ATTRIBUTES:
+                value = getattr(spot, attribute)
+                if value:
+                    indexes[attribute].setdefault(value.casefold(), set()).add(position)
+        self.indexes: Dict[str, Dict[str, FrozenSet[int]]] = {
+            attribute: {value: frozenset(positions) for value, positions in values.items()}
+            for attribute, values in indexes.items()
+        }
+
+    def filter(self, **criteria: Optional[str]) -> List[KiteSpot]:
+        """Spots matching every given attribute, in catalogue order."""
+        matches = [
+            self.indexes[attribute].get(value.casefold(), frozenset())
+            for attribute, value in criteria.items() if value is not None
         ]
+        if not matches:
+            return list(self.spots)
+        # Intersect starting from the smallest set
+        matches.sort(key=len)
+        positions = matches[0].intersection(*matches[1:])
+        return [self.spots[position] for position in sorted(positions)]
+
+
+class KiteSpotService(VersionedIndex[_CatalogueIndex]):
+    """
+    Kitespot catalogue lookups for the /api/kitespots routes.
 
-    def get_all_spots(self) -> List[KiteSpot]:
+    Backed by the kitespots table and rebuilt in a worker thread when the
+    database files change, like the suggestion and spatial indexes.
+    """
+
+    name = "kitespot catalogue index"
+
+    async def _load(self) -> List[dict]:
+        return await self.repository.list_all_spots()
+
+    def _build(self, rows: List[dict], key) -> _CatalogueIndex:
+        return _CatalogueIndex(rows)
+
+    async def get_all_spots(self) -> List[KiteSpot]:
         """Get all kitespots."""
-        return self.spots
+        return (await self.get()).spots
 
-    def get_spot_by_id(self, spot_id: str) -> Optional[KiteSpot]:
+    async def get_spot_by_id(self, spot_id: str) -> Optional[KiteSpot]:
         """Get a specific kitespot by ID."""
-        return next((spot for spot in self.spots if spot.id == spot_id), None)
+        return (await self.get()).by_id.get(spot_id)
 
-    def get_spots_by_country(self, country: str) -> List[KiteSpot]:
+    async def get_spots_by_country(self, country: str) -> List[KiteSpot]:
         """Get all kitespots in a specific country."""
-        return [spot for spot in self.spots if spot.country.lower() == country.lower()]
+        return (await self.get()).filter(country=country)
 
-    def get_spots_by_difficulty(self, difficulty: str) -> List[KiteSpot]:
+    async def get_spots_by_difficulty(self, difficulty: str) -> List[KiteSpot]:
         """Get all kitespots with a specific difficulty level."""
-        return [spot for spot in self.spots if spot.difficulty and spot.difficulty.lower() == difficulty.lower()]
+        return (await self.get()).filter(difficulty=difficulty)
 
-    def get_spots_by_water_type(self, water_type: str) -> List[KiteSpot]:
+    async def get_spots_by_water_type(self, water_type: str) -> List[KiteSpot]:
         """Get all kitespots with a specific water type."""
-        return [spot for spot in self.spots if spot.water_type and spot.water_type.lower() == water_type.lower()] 
\ No newline at end of file
+        return (await self.get()).filter(water_type=water_type)
+
+    async def search(self, country: Optional[str] = None, difficulty: Optional[str] = None,
+                     water_type: Optional[str] = None) -> List[KiteSpot]:
+        """Get all kitespots matching every given attribute."""
+        return (await self.get()).filter(country=country, difficulty=difficulty, water_type=water_type)
+
+
+# Create a global kitespot service
+kitespot_service = KiteSpotService()
+
+# Function to get the kitespot service
+def get_kitespot_service() -> KiteSpotService:
+    return kitespot_service
@@ -0,0 +1,203 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# "sequential" waits for each provider to fail before trying the next one,
+# "hedged" also starts the next one when the current one is slower than its
+# usual p95 latency, and "race" starts every provider at once.
+PROVIDER_STRATEGY = os.getenv("WEATHER_PROVIDER_STRATEGY", "sequential").lower()
+STRATEGIES = ("sequential", "hedged", "race")
+
+# Per-provider timeouts in seconds, overridable with WEATHER_TIMEOUT_<PROVIDER>
+DEFAULT_TIMEOUTS = {
+    "tomorrow": 5.0,
+    "weatherbit": 5.0,
+}
+DEFAULT_TIMEOUT = 5.0
+
+# Hedge after this latency quantile of the provider's recent calls
+HEDGE_QUANTILE = 0.95
+HEDGE_MIN_SAMPLES = 20
+HEDGE_DEFAULT_DELAY = 1.0
+HEDGE_MIN_DELAY = 0.05
+HEDGE_MAX_DELAY = 3.0
+
+HISTOGRAM_SIZE = 512
+
+Provider = Tuple[str, Callable[[], Awaitable[Any]]]
+
+
+class LatencyHistogram:
+    """
+    Sliding window of a provider's most recent call latencies.
+
+    Calls that were cut off (timed out, or cancelled because another
+    provider answered first) are kept as censored samples at the time they
+    were stopped: their real latency was at least that long. Leaving them
+    out would keep only the fast calls, so the quantiles, and with them the
+    hedge delay, would keep drifting down.
+    """
+
+    def __init__(self, size: int = HISTOGRAM_SIZE):
+        self._samples = deque(maxlen=size)
+        self.successes = 0
+        self.failures = 0
+        self.censored = 0
+
+    def record(self, seconds: float, censored: bool = False):
+        self._samples.append(seconds)
+        if censored:
+            self.censored += 1
+        else:
+            self.successes += 1
+
+    def record_failure(self):
+        self.failures += 1
+
+    def __len__(self):
+        return len(self._samples)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """The q quantile; a lower bound when it falls on a censored sample."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def stats(self) -> dict:
+        return {
+            "samples": len(self._samples),
+            "successes": self.successes,
+            "failures": self.failures,
+            "censored": self.censored,
+            "p50_ms": self._ms(self.quantile(0.5)),
+            "p95_ms": self._ms(self.quantile(0.95)),
+            "p99_ms": self._ms(self.quantile(0.99)),
+        }
+
+    @staticmethod
+    def _ms(seconds: Optional[float]) -> Optional[float]:
+        return round(seconds * 1000, 1) if seconds is not None else None
+
+
+class AllProvidersFailed(Exception):
+    """Raised when no provider returned data."""
+
+
+class ProviderStrategy:
+    """
+    Decides how a request is spread over an ordered list of providers.
+
+    Each provider call gets its own timeout and its latency is recorded.
+    As soon as one provider succeeds, calls still running for the other
+    providers are cancelled.
+    """
+
+    def __init__(self, mode: str = PROVIDER_STRATEGY, timeouts: Optional[Dict[str, float]] = None):
+        if mode not in STRATEGIES:
+            logger.warning(f"Unknown provider strategy '{mode}', using sequential")
+            mode = "sequential"
+        self.mode = mode
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        for provider in self.timeouts:
+            env_timeout = os.getenv(f"WEATHER_TIMEOUT_{provider.upper()}")
+            if env_timeout:
+                self.timeouts[provider] = float(env_timeout)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.latencies: Dict[str, LatencyHistogram] = {}
+
+    def _histogram(self, provider: str) -> LatencyHistogram:
+        if provider not in self.latencies:
+            self.latencies[provider] = LatencyHistogram()
+        return self.latencies[provider]
+
+    def hedge_delay(self, provider: str) -> float:
+        """How long to wait for a provider before also asking the next one."""
+        histogram = self._histogram(provider)
+        if len(histogram) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return min(max(histogram.quantile(HEDGE_QUANTILE), HEDGE_MIN_DELAY), HEDGE_MAX_DELAY)
+
+    async def _call(self, provider: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        histogram = self._histogram(provider)
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(fetch(), self.timeouts.get(provider, DEFAULT_TIMEOUT))
+        except asyncio.CancelledError:
+            # Lost a hedge or race: it would have taken at least this long
+            histogram.record(time.perf_counter() - started, censored=True)
+            raise
+        except asyncio.TimeoutError:
+            histogram.record_failure()
+            histogram.record(time.perf_counter() - started, censored=True)
+            raise
+        except Exception:
+            histogram.record_failure()
+            raise
+        histogram.record(time.perf_counter() - started)
+        return result
+
+    async def run(self, providers: List[Provider]) -> Any:
+        """Return the first successful provider result."""
+        remaining = list(providers)
+        running: Dict[asyncio.Task, str] = {}
+        errors: List[str] = []
+        last_started = None
+
+        def start_next():
+            nonlocal last_started
+            name, fetch = remaining.pop(0)
+            running[asyncio.ensure_future(self._call(name, fetch))] = name
+            last_started = name
+
+        start_next()
+        if self.mode == "race":
+            while remaining:
+                start_next()
+
+        try:
+            while running:
+                delay = None
+                if remaining and self.mode == "hedged":
+                    delay = self.hedge_delay(last_started)
+
+                done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                failed = False
+                for task in done:
+                    name = running.pop(task)
+                    exc = task.exception()
+                    logger.warning(f"{name} provider failed: {type(exc).__name__}: {str(exc)}")
+                    errors.append(f"{name}: {type(exc).__name__}")
+                    failed = True
+
+                # Fall back on failure, or hedge when the hedge delay ran out
+                if remaining and (failed or not done):
+                    start_next()
+        finally:
+            for task in running:
+                task.cancel()
+
+        raise AllProvidersFailed(f"All providers failed ({', '.join(errors)})")
+
+    def stats(self) -> dict:
+        return {
+            "strategy": self.mode,
+            "providers": {
+                provider: {
+                    **histogram.stats(),
+                    "timeout": self.timeouts.get(provider, DEFAULT_TIMEOUT),
+                    "hedge_delay_ms": round(self.hedge_delay(provider) * 1000, 1),
+                }
+                for provider, histogram in self.latencies.items()
+            },
+        }
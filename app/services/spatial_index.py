@@ -0,0 +1,177 @@
+import numpy as np
+from typing import List, Optional, Tuple
+from .versioned_index import VersionedIndex
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Size of a grid cell in degrees
+CELL_DEG = 1.0
+
+# Below this many spots a full vectorized scan beats walking the grid
+BRUTE_FORCE_LIMIT = 2048
+
+
+def haversine_km(lat: float, lon: float, lats_rad: np.ndarray, lons_rad: np.ndarray,
+                 cos_lats: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km from one point to arrays of points (in radians)."""
+    lat_rad = np.radians(lat)
+    lon_rad = np.radians(lon)
+    a = (np.sin((lats_rad - lat_rad) / 2) ** 2
+         + np.cos(lat_rad) * cos_lats * np.sin((lons_rad - lon_rad) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class _GridData:
+    """
+    Immutable latitude/longitude grid over the spot catalogue.
+
+    Points are sorted by cell ID (row-major, latitude rows of longitude
+    cells), so every run of neighbouring cells in one latitude row is a
+    contiguous slice of the point arrays.
+    """
+
+    def __init__(self, rows: List[dict]):
+        self.n_lat = int(round(180 / CELL_DEG))
+        self.n_lon = int(round(360 / CELL_DEG))
+
+        lats = np.array([row["latitude"] for row in rows], dtype=np.float64)
+        lons = np.array([row["longitude"] for row in rows], dtype=np.float64)
+        lons = (lons + 180.0) % 360.0 - 180.0
+
+        cells = self._row_index(lats) * self.n_lon + self._col_index(lons)
+        order = np.argsort(cells, kind="stable")
+
+        self.rows = [rows[i] for i in order]
+        self.lats_rad = np.radians(lats[order])
+        self.lons_rad = np.radians(lons[order])
+        self.cos_lats = np.cos(self.lats_rad)
+        self.cell_starts = np.searchsorted(cells[order], np.arange(self.n_lat * self.n_lon + 1))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _row_index(self, lat):
+        return np.clip(((np.asarray(lat) + 90.0) // CELL_DEG).astype(np.int64), 0, self.n_lat - 1)
+
+    def _col_index(self, lon):
+        return np.clip(((np.asarray(lon) + 180.0) // CELL_DEG).astype(np.int64), 0, self.n_lon - 1)
+
+    def _full_width(self, row: int, r: int) -> bool:
+        # Take whole latitude rows once a block spans half the globe or
+        # reaches a pole, where all longitudes converge
+        return 2 * (2 * r + 1) >= self.n_lon or row - r <= 0 or row + r >= self.n_lat - 1
+
+    def _block(self, row: int, col: int, r: int) -> np.ndarray:
+        """Indices of all points in the (2r+1) x (2r+1) block of cells around a cell."""
+        row_lo, row_hi = max(row - r, 0), min(row + r, self.n_lat - 1)
+        if self._full_width(row, r):
+            col_ranges = [(0, self.n_lon - 1)]
+        else:
+            col_lo, col_hi = col - r, col + r
+            if col_lo < 0:
+                col_ranges = [(col_lo + self.n_lon, self.n_lon - 1), (0, col_hi)]
+            elif col_hi >= self.n_lon:
+                col_ranges = [(col_lo, self.n_lon - 1), (0, col_hi - self.n_lon)]
+            else:
+                col_ranges = [(col_lo, col_hi)]
+
+        slices = []
+        for lat_row in range(row_lo, row_hi + 1):
+            base = lat_row * self.n_lon
+            for lo, hi in col_ranges:
+                start, end = self.cell_starts[base + lo], self.cell_starts[base + hi + 1]
+                if end > start:
+                    slices.append(np.arange(start, end))
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def _covered_km(self, lat: float, lon: float, row: int, col: int, r: int) -> float:
+        """Distance from the query point within which the block is guaranteed complete."""
+        if self._full_width(row, r) and row - r <= 0 and row + r >= self.n_lat - 1:
+            return np.inf
+
+        south = -90.0 + (row - r) * CELL_DEG
+        north = -90.0 + (row + r + 1) * CELL_DEG
+        lat_margin = min(lat - south if row - r > 0 else np.inf,
+                         north - lat if row + r < self.n_lat - 1 else np.inf)
+
+        if self._full_width(row, r):
+            lon_margin_km = np.inf
+        else:
+            west = -180.0 + (col - r) * CELL_DEG
+            east = -180.0 + (col + r + 1) * CELL_DEG
+            lon_margin = min(lon - west, east - lon)
+            # Exact distance to the great circle of the nearest bounding meridian,
+            # a lower bound for the distance to any point beyond it
+            lon_margin_km = EARTH_RADIUS_KM * np.arcsin(
+                np.cos(np.radians(lat)) * np.sin(np.radians(lon_margin))
+            )
+
+        return min(np.radians(lat_margin) * EARTH_RADIUS_KM, lon_margin_km)
+
+    def query(self, lat: float, lon: float, k: int,
+              radius_km: Optional[float] = None) -> List[Tuple[dict, float]]:
+        if not self.rows:
+            return []
+        lon = (lon + 180.0) % 360.0 - 180.0
+
+        if len(self.rows) <= BRUTE_FORCE_LIMIT:
+            candidates = np.arange(len(self.rows))
+        else:
+            row, col = int(self._row_index(lat)), int(self._col_index(lon))
+            r = 1
+            while True:
+                candidates = self._block(row, col, r)
+                covered = self._covered_km(lat, lon, row, col, r)
+                if radius_km is not None and covered >= radius_km:
+                    break
+                if len(candidates) >= k:
+                    distances = haversine_km(lat, lon, self.lats_rad[candidates],
+                                             self.lons_rad[candidates], self.cos_lats[candidates])
+                    if np.partition(distances, k - 1)[k - 1] <= covered:
+                        break
+                if np.isinf(covered):
+                    break
+                r *= 2
+
+        distances = haversine_km(lat, lon, self.lats_rad[candidates],
+                                 self.lons_rad[candidates], self.cos_lats[candidates])
+        if radius_km is not None:
+            within = distances <= radius_km
+            candidates, distances = candidates[within], distances[within]
+
+        if len(distances) > k:
+            nearest = np.argpartition(distances, k - 1)[:k]
+            candidates, distances = candidates[nearest], distances[nearest]
+        order = np.argsort(distances, kind="stable")
+
+        return [(self.rows[candidates[i]], float(distances[i])) for i in order]
+
+
+class SpatialIndex(VersionedIndex[_GridData]):
+    """
+    Nearest-neighbour lookups over the spot catalogue.
+
+    Built from the kitespots table and rebuilt in a worker thread when the
+    database files change, in the same way as the suggestion index.
+    """
+
+    name = "spatial index"
+
+    async def _load(self) -> List[dict]:
+        return await self.repository.list_spot_coordinates()
+
+    def _build(self, rows: List[dict], key) -> _GridData:
+        return _GridData(rows)
+
+    async def nearest(self, lat: float, lon: float, k: int = 10,
+                      radius_km: Optional[float] = None) -> List[Tuple[dict, float]]:
+        """Get up to k spots closest to a point, with their distance in km."""
+        return (await self.get()).query(lat, lon, k, radius_km)
+
+
+# Create a global spatial index
+spatial_index = SpatialIndex()
+
+# Function to get the spatial index
+def get_spatial_index() -> SpatialIndex:
+    return spatial_index
@@ -0,0 +1,136 @@
+import os
+import re
+import heapq
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from .kitespot_repository import KitespotRepository
+from .versioned_index import VersionedIndex
+
+# Which engine serves /api/kitespot-suggestions: "memory" or "sqlite"
+SUGGESTION_BACKEND = os.getenv("SUGGESTION_BACKEND", "memory").lower()
+
+# Prefixes up to this length get their top results precomputed
+PRECOMPUTED_PREFIX_LENGTH = 3
+TOP_K = 10
+
+# How often to check the database for changes, in seconds
+RELOAD_CHECK_INTERVAL = float(os.getenv("SUGGESTION_RELOAD_INTERVAL", "2"))
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize(text: Optional[str]) -> str:
+    """Case-fold text and strip diacritics so "Tarifa" and "tárifa" match."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+class _IndexData:
+    """
+    Immutable snapshot of the suggestion index.
+
+    Tokens are kept in one sorted list with a parallel array of spot IDs,
+    so every prefix maps to a contiguous slice found with two bisections.
+    """
+
+    def __init__(self, rows: Iterable[dict]):
+        self.rows: Dict[int, dict] = {}
+        self.names: Dict[int, str] = {}
+        self.locations: Dict[int, str] = {}
+
+        postings: List[Tuple[str, int]] = []
+        for row in rows:
+            spot_id = row["id"]
+            self.rows[spot_id] = row
+            self.names[spot_id] = normalize(row["name"])
+            self.locations[spot_id] = normalize(row["location"])
+            text = f"{row['name']} {row['location'] or ''} {row['country'] or ''}"
+            for token in set(_TOKEN_RE.findall(normalize(text))):
+                postings.append((token, spot_id))
+
+        postings.sort()
+        self.tokens: List[str] = [token for token, _ in postings]
+        self.token_ids = array("q", (spot_id for _, spot_id in postings))
+
+        # Precompute the answer for every short prefix
+        prefix_ids: Dict[str, set] = defaultdict(set)
+        for token, spot_id in postings:
+            for length in range(1, min(len(token), PRECOMPUTED_PREFIX_LENGTH) + 1):
+                prefix_ids[token[:length]].add(spot_id)
+        self.top: Dict[str, List[int]] = {
+            prefix: self._rank(prefix, ids, TOP_K)
+            for prefix, ids in prefix_ids.items()
+        }
+
+    def _sort_key(self, query: str, spot_id: int):
+        # Same ordering as the SQL endpoint: name matches, then location matches
+        if self.names[spot_id].startswith(query):
+            tier = 1
+        elif self.locations[spot_id].startswith(query):
+            tier = 2
+        else:
+            tier = 3
+        return tier, self.rows[spot_id]["name"], spot_id
+
+    def _rank(self, query: str, ids: Iterable[int], limit: int) -> List[int]:
+        return heapq.nsmallest(limit, ids, key=lambda spot_id: self._sort_key(query, spot_id))
+
+    def _ids_with_prefix(self, prefix: str) -> set:
+        lo = bisect_left(self.tokens, prefix)
+        hi = bisect_left(self.tokens, prefix + "\U0010ffff", lo)
+        return set(self.token_ids[lo:hi])
+
+    def search(self, q: str, limit: int) -> List[dict]:
+        query = normalize(q).strip()
+        tokens = _TOKEN_RE.findall(query)
+        if not tokens:
+            return []
+
+        if (len(tokens) == 1 and tokens[0] == query
+                and len(query) <= PRECOMPUTED_PREFIX_LENGTH and limit <= TOP_K):
+            ids = self.top.get(query, [])[:limit]
+        else:
+            # Start from the rarest token to keep the intersection small
+            candidates = sorted((self._ids_with_prefix(token) for token in tokens), key=len)
+            matches = candidates[0].intersection(*candidates[1:])
+            ids = self._rank(query, matches, limit)
+
+        return [self.rows[spot_id] for spot_id in ids]
+
+
+class SuggestionIndex(VersionedIndex[_IndexData]):
+    """
+    In-process autocomplete index over the kitespots table.
+
+    Built once at startup and rebuilt in a worker thread whenever the
+    database files change on disk. Searches always run against a complete
+    snapshot, which is swapped in with a single assignment.
+    """
+
+    name = "suggestion index"
+
+    def __init__(self, repository: Optional[KitespotRepository] = None):
+        super().__init__(repository, check_interval=RELOAD_CHECK_INTERVAL)
+
+    async def _load(self) -> List[dict]:
+        return await self.repository.list_suggestion_rows()
+
+    def _build(self, rows: List[dict], key) -> _IndexData:
+        return _IndexData(rows)
+
+    async def search(self, q: str, limit: int = TOP_K) -> List[dict]:
+        """Get up to `limit` spots matching the query, best match first."""
+        return (await self.get()).search(q, limit)
+
+
+# Create a global suggestion index
+suggestion_index = SuggestionIndex()
+
+# Function to get the suggestion index
+def get_suggestion_index() -> SuggestionIndex:
+    return suggestion_index
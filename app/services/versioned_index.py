@@ -0,0 +1,107 @@
+import time
+import asyncio
+import logging
+from typing import Any, Generic, Hashable, List, Optional, Tuple, TypeVar
+from .kitespot_repository import KitespotRepository, get_kitespot_repository
+
+logger = logging.getLogger(__name__)
+
+# How often to stat the database file for changes, in seconds
+RELOAD_CHECK_INTERVAL = 2.0
+
+T = TypeVar("T")
+
+
+class VersionedIndex(Generic[T]):
+    """
+    In-memory data built from the kitespots table and kept in step with it.
+
+    The database files are stat'ed at most every `check_interval` seconds.
+    When they changed, or `_build_key()` returned something new, the rows
+    are reloaded and the data is rebuilt in a worker thread, one rebuild at
+    a time. The rebuild runs as a background task and readers keep getting
+    the previous data without waiting until the new one is swapped in with
+    a single assignment. Only the first build, or a forced one, is waited
+    for.
+
+    Subclasses implement `_load()` and `_build()`, and override
+    `_build_key()` if the data depends on more than the database.
+    """
+
+    name = "index"
+
+    def __init__(self, repository: Optional[KitespotRepository] = None,
+                 check_interval: float = RELOAD_CHECK_INTERVAL):
+        self.repository = repository or get_kitespot_repository()
+        self.check_interval = check_interval
+        self._data: Optional[T] = None
+        self._version: Optional[Tuple[Any, Hashable]] = None
+        self._last_check = 0.0
+        self._lock = asyncio.Lock()
+        self._rebuild_task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._data is not None
+
+    async def _load(self) -> List[dict]:
+        """Read the rows the data is built from."""
+        raise NotImplementedError
+
+    def _build(self, rows: List[dict], key: Hashable) -> T:
+        """Build the data from the rows; runs in a worker thread."""
+        raise NotImplementedError
+
+    def _build_key(self) -> Hashable:
+        """Anything besides the database the data depends on, checked on every call."""
+        return None
+
+    def _is_current(self, version: Tuple[Any, Hashable]) -> bool:
+        return self._data is not None and self._version == version
+
+    async def refresh(self, force: bool = False):
+        """
+        Rebuild the data if the database or the build key changed since the
+        last build: in the background if there is data to serve meanwhile,
+        otherwise, or when forced, before returning.
+        """
+        key = self._build_key()
+        now = time.monotonic()
+        if force or self._data is None or now - self._last_check >= self.check_interval:
+            self._last_check = now
+            version = (self.repository.data_version(), key)
+        else:
+            version = (self._version[0], key)
+        if not force and self._is_current(version):
+            return
+        if force or self._data is None:
+            await self._rebuild(version, force)
+        elif self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(self._rebuild_in_background(version))
+
+    async def _rebuild(self, version: Tuple[Any, Hashable], force: bool = False):
+        key = version[1]
+        async with self._lock:
+            # Another request may have rebuilt it while we were waiting
+            if not force and self._is_current(version):
+                return
+            started = time.perf_counter()
+            rows = await self._load()
+            self._data = await asyncio.to_thread(self._build, rows, key)
+            self._version = version
+            logger.info(
+                f"Built {self.name} over {len(rows)} spots "
+                f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+            )
+
+    async def _rebuild_in_background(self, version: Tuple[Any, Hashable]):
+        try:
+            await self._rebuild(version)
+        except Exception as e:
+            # Readers keep the previous data; the next check tries again
+            logger.error(f"Failed to rebuild {self.name}: {str(e)}")
+
+    async def get(self) -> T:
+        """The current data; only waits for a build if there is none yet."""
+        await self.refresh()
+        return self._data
@@ -1,20 +1,31 @@
 import os
 import asyncio
 import logging
-from ..lib.ecmwf_client import ECMWFClient
-from ..lib.neuralgcm_wrapper import NeuralGCMWrapper
+import threading
 import aiohttp
 from datetime import datetime
-from typing import List, Tuple
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
 from ..models.weather import WeatherResponse, Location, WeatherData, Values, BatchWeatherResponse
+from ..utils.http_session import create_client_session
+from .forecast_cache import ForecastCache
+from .single_flight import SingleFlight
+from .provider_strategy import ProviderStrategy
+from .forecast_backends import FORECAST_BACKEND, get_backend_registry
+from ..utils.startup_report import get_startup_report
 
 logger = logging.getLogger(__name__)
 
 class WeatherService:
-    def __init__(self):
-        self.use_neuralgcm = os.getenv("USE_NEURALGCM", "false").lower() == "true"
-        self.ecmwf = ECMWFClient() if not self.use_neuralgcm else None
-        self.gcm = NeuralGCMWrapper() if self.use_neuralgcm else None
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None, backend: str = FORECAST_BACKEND):
+        self.session = session
+        self.backend = backend
+        self.use_neuralgcm = backend != "ecmwf"
+        self.ecmwf = get_backend_registry().load("ecmwf", session) if not self.use_neuralgcm else None
+        self._gcm = None
+        self._gcm_lock = threading.Lock()
+        self.cache = ForecastCache()
+        self.flights = SingleFlight()
+        self.provider_strategy = ProviderStrategy()
         self.popular_destinations = [
             {
                 "name": "Tarifa",
@@ -33,21 +44,76 @@ class WeatherService:
             }
         ]
 
+    @property
+    def gcm(self):
+        """The model backend, loaded on first use so startup never waits for it."""
+        if self._gcm is None and self.use_neuralgcm:
+            with self._gcm_lock:
+                if self._gcm is None:
+                    self._gcm = get_backend_registry().load(self.backend)
+        return self._gcm
+
+    async def warmup(self):
+        """Load and warm up the model backend off the event loop, after startup."""
+        if not self.use_neuralgcm:
+            return
+        try:
+            with get_startup_report().measure(self.backend, "warmup"):
+                await asyncio.to_thread(lambda: self.gcm.warmup())
+            logger.info(f"{self.backend} backend warmed up")
+        except Exception as e:
+            logger.error(f"{self.backend} warmup failed: {str(e)}")
+
+    def set_session(self, session: aiohttp.ClientSession):
+        """Share one pooled HTTP session with every provider."""
+        self.session = session
+        if self.ecmwf:
+            self.ecmwf.session = session
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Use the shared session, creating one if none was injected."""
+        if self.session is None or self.session.closed:
+            self.set_session(create_client_session())
+        return self.session
+
     async def enhance_forecast(self, lat: float, lon: float):
         """Get enhanced forecast from selected backend"""
+        provider = "neuralgcm" if self.use_neuralgcm else "ecmwf"
+        cached = self.cache.get(provider, lat, lon)
+        if cached is not None:
+            return cached
+
         try:
             if self.use_neuralgcm:
                 # Run synchronous NeuralGCM code in thread pool
-                return await asyncio.to_thread(
+                return await self._fetch_shared(provider, lat, lon, lambda: asyncio.to_thread(
                     self._neuralgcm_prediction, 
                     lat, 
                     lon
-                )
-            return await self._ecmwf_prediction(lat, lon)
+                ))
+            return await self._fetch_shared(provider, lat, lon, lambda: self._ecmwf_prediction(lat, lon))
         except Exception as e:
             logger.error(f"Enhancement failed: {str(e)}")
             return {"error": str(e), "source": "none"}
 
+    async def _fetch_shared(self, provider: str, lat: float, lon: float,
+                            fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Fetch a provider's data and cache it, coalescing concurrent callers.
+
+        All requests for the same provider and cache grid cell that arrive
+        while a fetch is running wait for that fetch instead of starting
+        their own upstream call.
+        """
+        async def fetch_and_store():
+            result = await fetch()
+            # Failed predictions are reported but never cached
+            if not (isinstance(result, dict) and "error" in result):
+                self.cache.set(provider, lat, lon, result)
+            return result
+
+        return await self.flights.do(self.cache.key(provider, lat, lon), fetch_and_store)
+
     def _neuralgcm_prediction(self, lat: float, lon: float):
         """Synchronous wrapper for NeuralGCM"""
         try:
@@ -70,90 +136,175 @@ class WeatherService:
             logger.error(f"ECMWF prediction failed: {str(e)}")
             return {"error": str(e), "source": "ECMWF"}
 
-    async def get_realtime_weather(self, lat: float, lon: float, tomorrow_api_key: str, weatherbit_api_key: str) -> WeatherResponse:
-        """Get realtime weather data, trying Tomorrow.io first and falling back to Weatherbit."""
+    def peek_wind_data(self, lat: float, lon: float) -> Optional[dict]:
+        """Get a warm ECMWF forecast from the cache without calling the upstream."""
+        if self.use_neuralgcm:
+            return None
+        return self.cache.get("ecmwf", lat, lon)
+
+    async def model_run_time(self) -> Optional[datetime]:
+        """Initialisation time of the upstream model run being served, if the backend reports one."""
+        if self.use_neuralgcm:
+            return None
         try:
-            # Try Tomorrow.io first
-            tomorrow_data = await self._get_tomorrow_weather(lat, lon, tomorrow_api_key)
-            if tomorrow_data:
-                return tomorrow_data
+            return await self.ecmwf.get_model_run_time()
         except Exception as e:
-            logger.warning(f"Tomorrow.io API failed: {str(e)}")
-        
-        # Fallback to Weatherbit
+            logger.warning(f"Could not get the ECMWF model run time: {str(e)}")
+            return None
+
+    async def get_wind_data_batch(self, locations: List[Tuple[float, float]], refresh: bool = False,
+                                  before_request: Optional[Callable[[], Awaitable]] = None) -> List[dict]:
+        """
+        Get forecasts for many locations at once, in the same order.
+
+        Locations with a fresh cache entry are served from the cache unless
+        `refresh` is set. The rest are deduplicated by cache grid cell and
+        fetched from Open-Meteo with multi-location requests, then written
+        back to the cache one by one. `before_request` is awaited before
+        each of those requests.
+        """
+        if self.use_neuralgcm:
+            # One vectorized interpolation into the cached rollout covers every location
+            try:
+                # Resolve self.gcm in the thread too: the first access loads the checkpoint
+                predictions = await asyncio.to_thread(lambda: self.gcm.predict_points(locations))
+                return [{"source": "NeuralGCM", **prediction} for prediction in predictions]
+            except Exception as e:
+                logger.error(f"NeuralGCM batch prediction failed: {str(e)}")
+                return [{"error": str(e), "source": "NeuralGCM"} for _ in locations]
+
+        results: List[Optional[dict]] = [None] * len(locations)
+        missing = {}
+        for i, (lat, lon) in enumerate(locations):
+            cached = None if refresh else self.cache.get("ecmwf", lat, lon)
+            if cached is not None:
+                results[i] = cached
+            else:
+                missing.setdefault(self.cache.key("ecmwf", lat, lon), []).append(i)
+
+        if missing:
+            to_fetch = [locations[indices[0]] for indices in missing.values()]
+            try:
+                fetched = await self.ecmwf.get_wind_data_batch(to_fetch, before_request=before_request)
+                for (lat, lon), indices, wind_data in zip(to_fetch, missing.values(), fetched):
+                    result = {"source": "ECMWF", **wind_data}
+                    # Locations whose request failed are reported but never cached
+                    if "error" not in result:
+                        self.cache.set("ecmwf", lat, lon, result)
+                    for i in indices:
+                        results[i] = result
+            except Exception as e:
+                logger.error(f"ECMWF batch prediction failed: {str(e)}")
+                for indices in missing.values():
+                    for i in indices:
+                        results[i] = {"error": str(e), "source": "ECMWF"}
+
+        return results
+
+    async def get_realtime_weather(self, lat: float, lon: float, tomorrow_api_key: str, weatherbit_api_key: str) -> WeatherResponse:
+        """
+        Get realtime weather data from Tomorrow.io, with Weatherbit as the fallback.
+
+        Whether Weatherbit only runs after Tomorrow.io failed, also runs when
+        Tomorrow.io is slow, or runs alongside it is set by the provider
+        strategy.
+        """
+        # Any fresh observation for this grid cell will do
+        for provider in ("tomorrow", "weatherbit"):
+            cached = self.cache.get(provider, lat, lon)
+            if cached is not None:
+                return self._at_location(cached, lat, lon)
+
+        providers = [
+            ("tomorrow", lambda: self._fetch_shared(
+                "tomorrow", lat, lon,
+                lambda: self._get_tomorrow_weather(lat, lon, tomorrow_api_key)
+            )),
+            ("weatherbit", lambda: self._fetch_shared(
+                "weatherbit", lat, lon,
+                lambda: self._get_weatherbit_weather(lat, lon, weatherbit_api_key)
+            )),
+        ]
+
         try:
-            return await self._get_weatherbit_weather(lat, lon, weatherbit_api_key)
+            weather_data = await self.provider_strategy.run(providers)
+            return self._at_location(weather_data, lat, lon)
         except Exception as e:
             logger.error(f"Both weather APIs failed: {str(e)}")
             raise Exception("Failed to fetch weather data from both Tomorrow.io and Weatherbit")
 
+    @staticmethod
+    def _at_location(response: WeatherResponse, lat: float, lon: float) -> WeatherResponse:
+        """Label a cached response with the exact location that was requested."""
+        return response.copy(update={
+            "location": Location(lat=lat, lon=lon, name=f"{lat}, {lon}")
+        })
+
     async def _get_tomorrow_weather(self, lat: float, lon: float, api_key: str) -> WeatherResponse:
         """Get weather data from Tomorrow.io API."""
         url = f"https://api.tomorrow.io/v4/weather/realtime?location={lat},{lon}&apikey={api_key}"
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    raise Exception(f"Tomorrow.io API error: {response.status}")
-                
-                data = await response.json()
-                weather_data = data["data"]["values"]
-                
-                return WeatherResponse(
-                    location=Location(
-                        lat=lat,
-                        lon=lon,
-                        name=f"{lat}, {lon}"
-                    ),
-                    data=WeatherData(
-                        time=datetime.utcnow().isoformat(),
-                        values=Values(
-                            temperature=weather_data["temperature"],
-                            windSpeed=weather_data["windSpeed"],
-                            windDirection=weather_data["windDirection"],
-                            precipitationIntensity=weather_data.get("precipitationIntensity"),
-                            humidity=weather_data.get("humidity"),
-                            pressureSurfaceLevel=weather_data.get("pressureSurfaceLevel"),
-                            visibility=weather_data.get("visibility"),
-                            cloudCover=weather_data.get("cloudCover"),
-                            uvIndex=weather_data.get("uvIndex")
-                        )
+        async with self._get_session().get(url) as response:
+            if response.status != 200:
+                raise Exception(f"Tomorrow.io API error: {response.status}")
+            
+            data = await response.json()
+            weather_data = data["data"]["values"]
+            
+            return WeatherResponse(
+                location=Location(
+                    lat=lat,
+                    lon=lon,
+                    name=f"{lat}, {lon}"
+                ),
+                data=WeatherData(
+                    time=datetime.utcnow().isoformat(),
+                    values=Values(
+                        temperature=weather_data["temperature"],
+                        windSpeed=weather_data["windSpeed"],
+                        windDirection=weather_data["windDirection"],
+                        precipitationIntensity=weather_data.get("precipitationIntensity"),
+                        humidity=weather_data.get("humidity"),
+                        pressureSurfaceLevel=weather_data.get("pressureSurfaceLevel"),
+                        visibility=weather_data.get("visibility"),
+                        cloudCover=weather_data.get("cloudCover"),
+                        uvIndex=weather_data.get("uvIndex")
                     )
                 )
+            )
 
     async def _get_weatherbit_weather(self, lat: float, lon: float, api_key: str) -> WeatherResponse:
         """Get weather data from Weatherbit API."""
         url = f"https://api.weatherbit.io/v2.0/current?lat={lat}&lon={lon}&key={api_key}"
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    raise Exception(f"Weatherbit API error: {response.status}")
-                
-                data = await response.json()
-                weather_data = data["data"][0]
-                
-                return WeatherResponse(
-                    location=Location(
-                        lat=lat,
-                        lon=lon,
-                        name=f"{lat}, {lon}"
-                    ),
-                    data=WeatherData(
-                        time=datetime.utcnow().isoformat(),
-                        values=Values(
-                            temperature=weather_data["temp"],
-                            windSpeed=weather_data["wind_spd"],
-                            windDirection=weather_data["wind_dir"],
-                            precipitationIntensity=weather_data.get("precip"),
-                            humidity=weather_data.get("rh"),
-                            pressureSurfaceLevel=weather_data.get("pres"),
-                            visibility=weather_data.get("vis"),
-                            cloudCover=weather_data.get("clouds"),
-                            uvIndex=weather_data.get("uv")
-                        )
+        async with self._get_session().get(url) as response:
+            if response.status != 200:
+                raise Exception(f"Weatherbit API error: {response.status}")
+            
+            data = await response.json()
+            weather_data = data["data"][0]
+            
+            return WeatherResponse(
+                location=Location(
+                    lat=lat,
+                    lon=lon,
+                    name=f"{lat}, {lon}"
+                ),
+                data=WeatherData(
+                    time=datetime.utcnow().isoformat(),
+                    values=Values(
+                        temperature=weather_data["temp"],
+                        windSpeed=weather_data["wind_spd"],
+                        windDirection=weather_data["wind_dir"],
+                        precipitationIntensity=weather_data.get("precip"),
+                        humidity=weather_data.get("rh"),
+                        pressureSurfaceLevel=weather_data.get("pres"),
+                        visibility=weather_data.get("vis"),
+                        cloudCover=weather_data.get("clouds"),
+                        uvIndex=weather_data.get("uv")
                     )
                 )
+            )
 
     async def get_batch_weather(self, tomorrow_api_key: str, weatherbit_api_key: str) -> BatchWeatherResponse:
         """Get weather data for multiple popular destinations."""
@@ -179,3 +330,14 @@ class WeatherService:
             data=valid_results,
             _meta={"source": "tomorrow.io/weatherbit"}
         )
+
+
+# The global weather service shared by every router, created on first use
+weather_service: Optional[WeatherService] = None
+
+# Function to get the weather service
+def get_weather_service() -> WeatherService:
+    global weather_service
+    if weather_service is None:
+        weather_service = WeatherService()
+    return weather_service
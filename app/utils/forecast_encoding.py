@@ -0,0 +1,146 @@
+from typing import List, Optional, Tuple
+import numpy as np
+from .forecast_generator import SyntheticForecast
+
+try:
+    import msgpack
+except ImportError:  # Listed in requirements.txt; without it msgpack clients get JSON
+    msgpack = None
+
+# Hourly variables in the order they appear in columnar and binary responses
+FORECAST_FIELDS = ("wind_speed", "wind_direction", "temperature", "gust", "precipitation_probability")
+
+OCTET_STREAM = "application/octet-stream"
+MSGPACK_TYPES = ("application/x-msgpack", "application/msgpack")
+
+# Encodings by media type, in order of preference when the client likes them equally
+MEDIA_TYPES = [("application/json", "json"), (OCTET_STREAM, "float32")] + [
+    (media_type, "msgpack") for media_type in MSGPACK_TYPES
+]
+
+def time_axis(forecast: SyntheticForecast) -> Tuple[str, int, Optional[np.ndarray]]:
+    """
+    Describe the forecast times compactly.
+
+    :return: Tuple of (start time, step in seconds, hour offsets); the
+        offsets are None when every hour is present, so start + i * step
+        gives the time of value i
+    """
+    times = forecast.times.astype("datetime64[h]")
+    start = np.datetime_as_string(times[0], unit="s") if len(times) else None
+    offsets = (times - times[0]).astype(np.int64) if len(times) else np.zeros(0, dtype=np.int64)
+    regular = bool(np.array_equal(offsets, np.arange(len(offsets))))
+    return start, 3600, None if regular else offsets
+
+def columnar(forecast: SyntheticForecast, golden_kitewindow: Optional[dict]) -> dict:
+    """Forecast as parallel arrays plus a start time and step instead of per-hour objects."""
+    start, step, offsets = time_axis(forecast)
+    result = {"start": start, "step_seconds": step, "hours": len(forecast.times)}
+    if offsets is not None:
+        result["hour_offsets"] = offsets.tolist()
+    for field in FORECAST_FIELDS:
+        result[field] = getattr(forecast, field).tolist()
+    result["wind_direction"] = forecast.wind_direction.astype(int).tolist()
+    result["golden_kitewindow"] = golden_kitewindow
+    return result
+
+def binary_fields(forecast: SyntheticForecast) -> List[str]:
+    fields = list(FORECAST_FIELDS)
+    if time_axis(forecast)[2] is not None:
+        fields.insert(0, "hour_offset")
+    return fields
+
+def to_float32(forecast: SyntheticForecast, golden_kitewindow: Optional[dict]) -> Tuple[bytes, dict]:
+    """
+    Forecast as one block of little-endian float32 values, field after field.
+
+    :return: Tuple of (body, headers); the headers give the start time,
+        step, number of hours, field order and the golden window as
+        start_time,end_time,score
+    """
+    start, step, offsets = time_axis(forecast)
+    columns = [getattr(forecast, field) for field in FORECAST_FIELDS]
+    if offsets is not None:
+        columns.insert(0, offsets)
+    body = np.stack(columns).astype("<f4", copy=False).tobytes() if columns[0].size else b""
+    headers = {
+        "X-Forecast-Start": start or "",
+        "X-Forecast-Step": str(step),
+        "X-Forecast-Hours": str(len(forecast.times)),
+        "X-Forecast-Fields": ",".join(binary_fields(forecast)),
+        "X-Forecast-Dtype": "<f4",
+    }
+    if golden_kitewindow:
+        headers["X-Golden-Kitewindow"] = ",".join(
+            str(golden_kitewindow[key]) for key in ("start_time", "end_time", "score")
+        )
+    return body, headers
+
+def to_msgpack(forecast: SyntheticForecast, golden_kitewindow: Optional[dict]) -> bytes:
+    """
+    Forecast as MessagePack, with each hourly field as raw little-endian
+    float32 bytes rather than a list of numbers.
+    """
+    start, step, offsets = time_axis(forecast)
+    payload = {"start": start, "step_seconds": step, "hours": len(forecast.times), "dtype": "<f4"}
+    if offsets is not None:
+        payload["hour_offsets"] = offsets.astype("<f4").tobytes()
+    for field in FORECAST_FIELDS:
+        payload[field] = np.ascontiguousarray(getattr(forecast, field), dtype="<f4").tobytes()
+    payload["golden_kitewindow"] = golden_kitewindow
+    return msgpack.packb(payload, use_bin_type=True)
+
+def _media_ranges(accept: str) -> List[Tuple[str, float]]:
+    """(media range, q) pairs of an Accept header; malformed q values count as 0."""
+    ranges = []
+    for part in accept.split(","):
+        media_range, *params = [item.strip() for item in part.split(";")]
+        if not media_range:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+        ranges.append((media_range.lower(), q))
+    return ranges
+
+def _quality(media_type: str, ranges: List[Tuple[str, float]]) -> Tuple[float, int]:
+    """q of the most specific range matching a media type, and how specific it was (2 exact, 1 type/*, 0 */*)."""
+    kind = media_type.split("/")[0]
+    best = (-1, 0.0)
+    for media_range, q in ranges:
+        if media_range == media_type:
+            specificity = 2
+        elif media_range == f"{kind}/*":
+            specificity = 1
+        elif media_range == "*/*":
+            specificity = 0
+        else:
+            continue
+        best = max(best, (specificity, q), key=lambda match: match[0])
+    specificity, q = best
+    return q, specificity
+
+def negotiate(accept: Optional[str]) -> str:
+    """
+    Pick json, float32 or msgpack from an Accept header.
+
+    Media ranges are matched with their q values, the most specific range
+    deciding for each media type. The highest q wins, then an exact match
+    over a wildcard, then JSON. Falls back to JSON when nothing is acceptable.
+    """
+    ranges = _media_ranges(accept or "")
+    if not ranges:
+        return "json"
+    best, best_score = "json", (0.0, -1)
+    for media_type, encoding in MEDIA_TYPES:
+        if encoding == "msgpack" and msgpack is None:
+            continue
+        q, specificity = _quality(media_type, ranges)
+        if q > 0 and (q, specificity) > best_score:
+            best, best_score = encoding, (q, specificity)
+    return best
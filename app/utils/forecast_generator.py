@@ -0,0 +1,108 @@
+from datetime import datetime
+from typing import NamedTuple, Sequence
+import numpy as np
+
+# Longest horizon the generator serves
+MAX_FORECAST_DAYS = 16
+
+# Change to reshuffle every generated forecast
+SEED = 0x6B697465
+
+# Independent random streams
+_BASE_SPEED, _PREVAILING_DIRECTION, _BASE_TEMPERATURE, _DAY_TEMPERATURE, _DAY_DIRECTION, \
+    _SPEED_NOISE, _DIRECTION_NOISE, _GUST, _PRECIPITATION = range(9)
+
+# Daily values are drawn with this in place of the hour of day
+_DAILY = 24
+
+class SyntheticForecast(NamedTuple):
+    """Hourly forecast arrays of shape (spots, hours), sharing one time axis."""
+    times: np.ndarray                       # datetime64[h], shape (hours,)
+    wind_speed: np.ndarray                  # knots
+    wind_direction: np.ndarray              # degrees
+    temperature: np.ndarray                 # °C
+    gust: np.ndarray                        # knots
+    precipitation_probability: np.ndarray   # percent
+
+    def row(self, index: int) -> "SyntheticForecast":
+        """The forecast of one spot, as 1-D arrays."""
+        return self._replace(**{field: getattr(self, field)[index] for field in self._fields if field != "times"})
+
+def _uniform(spot_ids: np.ndarray, days: np.ndarray, hours: np.ndarray, stream: int) -> np.ndarray:
+    """
+    Uniform [0, 1) numbers that depend only on their inputs.
+
+    A splitmix64 hash of (spot, day, hour, stream) stands in for a seeded
+    generator per spot and day, so any slice of the horizon can be computed
+    in one vectorized step and always comes out the same.
+    """
+    with np.errstate(over="ignore"):
+        x = (
+            spot_ids.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15) +
+            days.astype(np.uint64) * np.uint64(0xC2B2AE3D27D4EB4F) +
+            hours.astype(np.uint64) * np.uint64(0x165667B19E3779F9) +
+            np.uint64(stream) * np.uint64(0xD6E8FEB86659FD93) +
+            np.uint64(SEED)
+        )
+        x ^= x >> np.uint64(30)
+        x *= np.uint64(0xBF58476D1CE4E5B9)
+        x ^= x >> np.uint64(27)
+        x *= np.uint64(0x94D049BB133111EB)
+        x ^= x >> np.uint64(31)
+    return (x >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+def generate_forecasts(spot_ids: Sequence[int], start_time: datetime, hours: int) -> SyntheticForecast:
+    """
+    Simulated hourly forecasts for many spots in one shot.
+
+    Every value is a pure function of (spot, date, hour of day), so the same
+    spot and date always get the same forecast no matter when the horizon
+    starts or which spots are generated together. Each spot has a prevailing
+    wind direction and base temperature; each day draws its own base wind
+    and shifts, and the hours add a daily cycle peaking at noon plus noise.
+
+    :param spot_ids: Spot IDs, one row each
+    :param start_time: First hour of the forecast (minutes are ignored)
+    :param hours: Forecast length in hours, at most MAX_FORECAST_DAYS days
+    """
+    if not 1 <= hours <= MAX_FORECAST_DAYS * 24:
+        raise ValueError(f"hours must be between 1 and {MAX_FORECAST_DAYS * 24}")
+
+    ids = np.asarray(spot_ids, dtype=np.int64)[:, None]
+    offsets = np.arange(hours)
+    hour_of_day = (start_time.hour + offsets) % 24
+    days = start_time.toordinal() + (start_time.hour + offsets) // 24
+    daily = np.full_like(offsets, _DAILY)
+    spot_level = np.zeros_like(offsets)
+
+    # Per spot, then per spot and day
+    prevailing_direction = 360 * _uniform(ids, spot_level, daily, _PREVAILING_DIRECTION)
+    base_temperature = 15 + 15 * _uniform(ids, spot_level, daily, _BASE_TEMPERATURE)
+    base_wind_speed = np.round(8 + 17 * _uniform(ids, days, daily, _BASE_SPEED), 1)
+    day_direction = prevailing_direction + 90 * (_uniform(ids, days, daily, _DAY_DIRECTION) - 0.5)
+    day_temperature = base_temperature + 6 * (_uniform(ids, days, daily, _DAY_TEMPERATURE) - 0.5)
+
+    # Per hour
+    day_factor = 1.0 + 0.2 * np.sin(2 * np.pi * (hour_of_day - 12) / 24)  # Peak at noon
+    speed_noise = 0.8 + 0.4 * _uniform(ids, days, hour_of_day, _SPEED_NOISE)
+    direction_noise = np.floor(41 * _uniform(ids, days, hour_of_day, _DIRECTION_NOISE)) - 20
+
+    wind_speed = np.round(base_wind_speed * day_factor * speed_noise, 1)
+    wind_direction = np.floor(day_direction + direction_noise) % 360
+    temperature = np.round(day_temperature + 5 * np.sin(2 * np.pi * (hour_of_day - 14) / 24), 1)  # Peak at 2pm
+    gust = np.round(wind_speed * (1.1 + 0.4 * _uniform(ids, days, hour_of_day, _GUST)), 1)
+    precipitation = np.round(30 * _uniform(ids, days, hour_of_day, _PRECIPITATION), 1)
+
+    start = np.datetime64(start_time.replace(minute=0, second=0, microsecond=0, tzinfo=None), "h")
+    return SyntheticForecast(
+        times=start + offsets.astype("timedelta64[h]"),
+        wind_speed=wind_speed,
+        wind_direction=wind_direction,
+        temperature=temperature,
+        gust=gust,
+        precipitation_probability=precipitation,
+    )
+
+def generate_forecast(spot_id: int, start_time: datetime, hours: int) -> SyntheticForecast:
+    """Simulated hourly forecast for one spot, as 1-D arrays."""
+    return generate_forecasts([spot_id], start_time, hours).row(0)
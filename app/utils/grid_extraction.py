@@ -0,0 +1,132 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+
+MS_TO_KNOTS = 1.943844
+KELVIN = 273.15
+
+class GridWeights(NamedTuple):
+    """Indices and weights of the four grid cells around each point."""
+    i: np.ndarray       # Latitude index of the cell row below each point
+    j: np.ndarray       # Longitude index of the cell column west of each point
+    j_next: np.ndarray  # Column east of each point, wrapping around 360°
+    wy: np.ndarray      # Weight of row i + 1
+    wx: np.ndarray      # Weight of column j_next
+
+def grid_weights(grid_lats: np.ndarray, grid_lons: np.ndarray, lats, lons) -> GridWeights:
+    """
+    Map points to the surrounding cells of a regular or Gaussian grid.
+
+    :param grid_lats: Ascending grid latitudes
+    :param grid_lons: Ascending grid longitudes in [0, 360)
+    :param lats: Point latitudes
+    :param lons: Point longitudes, in any range
+    :return: Bilinear interpolation weights for every point
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64) % 360
+
+    # Points beyond the outermost latitudes take the edge row
+    i = np.clip(np.searchsorted(grid_lats, lats) - 1, 0, len(grid_lats) - 2)
+    wy = np.clip((lats - grid_lats[i]) / (grid_lats[i + 1] - grid_lats[i]), 0.0, 1.0)
+
+    # Longitudes wrap around, so the cell after the last column is the first one
+    j = (np.searchsorted(grid_lons, lons, side="right") - 1) % len(grid_lons)
+    j_next = (j + 1) % len(grid_lons)
+    span = (grid_lons[j_next] - grid_lons[j]) % 360
+    wx = ((lons - grid_lons[j]) % 360) / span
+
+    return GridWeights(i, j, j_next, wy, wx)
+
+def interpolate(field: np.ndarray, weights: GridWeights) -> np.ndarray:
+    """
+    Bilinearly interpolate a field at the weighted points.
+
+    :param field: Array of shape (..., latitude, longitude)
+    :return: Array of shape (..., points)
+    """
+    i, j, j_next, wy, wx = weights
+    return (
+        field[..., i, j] * (1 - wy) * (1 - wx) + field[..., i, j_next] * (1 - wy) * wx +
+        field[..., i + 1, j] * wy * (1 - wx) + field[..., i + 1, j_next] * wy * wx
+    )
+
+def wind_from_components(u: np.ndarray, v: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Wind speed in knots and the direction the wind blows from, in degrees."""
+    return np.hypot(u, v) * MS_TO_KNOTS, np.degrees(np.arctan2(-u, -v)) % 360
+
+def extract_points(u: np.ndarray, v: np.ndarray, grid_lats: np.ndarray, grid_lons: np.ndarray,
+                   lats, lons, temperature: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Wind (and temperature) at a list of points from (time, latitude, longitude) fields.
+
+    The u/v components are interpolated before converting to speed and
+    direction, so directions on either side of north average correctly.
+
+    :return: Dict of (points, time) arrays: wind_speed (kn), wind_direction
+        (degrees) and, if given, temperature (°C)
+    """
+    weights = grid_weights(grid_lats, grid_lons, lats, lons)
+    speed, direction = wind_from_components(interpolate(u, weights), interpolate(v, weights))
+    result = {"wind_speed": speed.T, "wind_direction": direction.T}
+    if temperature is not None:
+        result["temperature"] = interpolate(temperature, weights).T - KELVIN
+    return result
+
+def extract_spots(u: np.ndarray, v: np.ndarray, grid_lats: np.ndarray, grid_lons: np.ndarray,
+                  spots: Iterable[dict], temperature: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """Like extract_points, for spots with `latitude` and `longitude` keys, in the same order."""
+    spots = list(spots)
+    return extract_points(
+        u, v, grid_lats, grid_lons,
+        [spot["latitude"] for spot in spots], [spot["longitude"] for spot in spots],
+        temperature
+    )
+
+def bbox_indices(grid_lats: np.ndarray, grid_lons: np.ndarray,
+                 bbox: Tuple[float, float, float, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Grid rows and columns inside a bounding box.
+
+    :param bbox: (min_lat, min_lon, max_lat, max_lon); a box with
+        min_lon > max_lon crosses the antimeridian
+    :return: Tuple of (row indices, column indices), columns in west-to-east order
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    rows = np.flatnonzero((grid_lats >= min_lat) & (grid_lats <= max_lat))
+
+    # Measure every column's distance east of the box's western edge
+    east = (grid_lons - min_lon) % 360
+    width = (max_lon - min_lon) % 360 if max_lon - min_lon < 360 else 360
+    columns = np.flatnonzero(east <= width)
+    return rows, columns[np.argsort(east[columns], kind="stable")]
+
+def extract_region(u: np.ndarray, v: np.ndarray, grid_lats: np.ndarray, grid_lons: np.ndarray,
+                   bbox: Tuple[float, float, float, float], temperature: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Wind (and temperature) on the grid cells inside a bounding box.
+
+    :return: Dict with latitude and longitude axes and (time, latitude,
+        longitude) arrays of wind_speed, wind_direction and temperature
+    """
+    rows, columns = bbox_indices(grid_lats, grid_lons, bbox)
+    cells = np.ix_(rows, columns)
+    speed, direction = wind_from_components(u[:, cells[0], cells[1]], v[:, cells[0], cells[1]])
+    result = {
+        "latitude": grid_lats[rows],
+        "longitude": (grid_lons[columns] + 180) % 360 - 180,
+        "wind_speed": speed,
+        "wind_direction": direction,
+    }
+    if temperature is not None:
+        result["temperature"] = temperature[:, cells[0], cells[1]] - KELVIN
+    return result
+
+def to_series(values: Dict[str, np.ndarray], times: Sequence, decimals: int = 2) -> List[Dict[str, list]]:
+    """Turn (points, time) arrays into one JSON-friendly dict of hourly lists per point."""
+    times = [str(time) for time in times]
+    rounded = {name: np.round(array, decimals).tolist() for name, array in values.items()}
+    points = len(next(iter(rounded.values()))) if rounded else 0
+    return [
+        {"time": times, **{name: series[p] for name, series in rounded.items()}}
+        for p in range(points)
+    ]
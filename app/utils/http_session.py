@@ -0,0 +1,29 @@
+import os
+import aiohttp
+
+# Connection pool tuning for the upstream weather providers
+CONNECTION_LIMIT = int(os.getenv("HTTP_CONNECTION_LIMIT", "100"))
+CONNECTION_LIMIT_PER_HOST = int(os.getenv("HTTP_CONNECTION_LIMIT_PER_HOST", "20"))
+KEEPALIVE_TIMEOUT = 60    # Seconds an idle connection stays open
+DNS_CACHE_TTL = 300       # Seconds resolved hostnames are cached
+REQUEST_TIMEOUT = float(os.getenv("HTTP_REQUEST_TIMEOUT", "10"))
+
+def create_client_session() -> aiohttp.ClientSession:
+    """
+    Create the HTTP session shared by every weather provider.
+
+    Must be called from inside a running event loop. Connections are kept
+    alive and reused across requests, so only the first call to each host
+    pays for DNS, TCP and TLS setup.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=CONNECTION_LIMIT,
+        limit_per_host=CONNECTION_LIMIT_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        enable_cleanup_closed=True
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    )
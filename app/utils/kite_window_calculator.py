@@ -1,64 +1,182 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, NamedTuple, Sequence, Tuple
 import numpy as np
 
+# Adjust these weights based on importance
+SPEED_WEIGHT = 0.5
+SPEED_CONSISTENCY_WEIGHT = 0.3
+DIRECTION_CONSISTENCY_WEIGHT = 0.2
+
+# Ideal wind speed range (adjust as needed)
+IDEAL_SPEED_LOW = 15
+IDEAL_SPEED_HIGH = 25
+
+# Below this average wind speed a window is not rideable at all, however steady
+MIN_RIDEABLE_SPEED = 12
+
+# Windows shorter than this get only partial credit for consistency: one or two
+# hours say little about how steady the wind is, and a single hour has no spread
+# at all, so short windows would otherwise beat longer ones on consistency alone
+MIN_CONSISTENCY_HOURS = 3
+
+# Rideable windows scoring at or below this are too gusty or shifty to recommend
+GOLDEN_WINDOW_MIN_SCORE = 0.5
+
+class KiteWindow(NamedTuple):
+    start_index: int
+    window_size: int
+    score: float
+
+    @property
+    def end_index(self) -> int:
+        return self.start_index + self.window_size - 1
+
+def _rolling_sum(values: np.ndarray, window_size: int) -> np.ndarray:
+    """
+    Sum of every window of `window_size` consecutive values along the last axis.
+
+    :param values: Array of shape (..., hours)
+    :return: Array of shape (..., hours - window_size + 1)
+    """
+    cumsum = np.cumsum(values, axis=-1)
+    zeros = np.zeros(values.shape[:-1] + (1,), dtype=cumsum.dtype)
+    cumsum = np.concatenate([zeros, cumsum], axis=-1)
+    return cumsum[..., window_size:] - cumsum[..., :-window_size]
+
+def score_windows(wind_speed, wind_direction, window_sizes: Sequence[int] = (3,),
+                  min_speed: float = 0.0) -> np.ndarray:
+    """
+    Score every window of every requested length in one pass.
+
+    Rolling means and standard deviations come from cumulative sums, so the
+    cost does not grow with the window length. Wind direction consistency
+    uses circular statistics, so 350° and 10° count as close together.
+    Consistency is scaled down for windows shorter than MIN_CONSISTENCY_HOURS,
+    so scores of different window lengths can be compared.
+
+    :param wind_speed: Wind speeds of shape (hours,) or (spots, hours)
+    :param wind_direction: Wind directions in degrees, same shape as wind_speed
+    :param window_sizes: Window lengths in hours
+    :param min_speed: Windows with a lower average wind speed score -inf
+    :return: Scores of shape (..., len(window_sizes), hours), where
+        scores[..., i, t] is the window of length window_sizes[i] starting at
+        hour t. Windows that run past the end of the forecast score -inf.
+    """
+    speed = np.asarray(wind_speed, dtype=np.float64)
+    direction = np.radians(np.asarray(wind_direction, dtype=np.float64))
+    hours = speed.shape[-1]
+
+    speed_sq = speed ** 2
+    sin_dir = np.sin(direction)
+    cos_dir = np.cos(direction)
+
+    scores = np.full(speed.shape[:-1] + (len(window_sizes), hours), -np.inf)
+    for i, window_size in enumerate(window_sizes):
+        if window_size < 1 or window_size > hours:
+            continue
+        n_windows = hours - window_size + 1
+
+        avg_speed = _rolling_sum(speed, window_size) / window_size
+        variance = _rolling_sum(speed_sq, window_size) / window_size - avg_speed ** 2
+        std_speed = np.sqrt(np.clip(variance, 0.0, None))
+        speed_consistency = np.divide(
+            std_speed, avg_speed, out=np.ones_like(avg_speed), where=avg_speed > 0
+        )
+        speed_consistency = 1 - speed_consistency
+
+        # Mean resultant length R of the directions, turned into a circular std
+        resultant = np.hypot(_rolling_sum(sin_dir, window_size), _rolling_sum(cos_dir, window_size)) / window_size
+        circular_std = np.degrees(np.sqrt(-2 * np.log(np.clip(resultant, 1e-12, 1.0))))
+        direction_consistency = 1 - np.minimum(circular_std, 180) / 180
+
+        evidence = min(1.0, (window_size - 1) / (MIN_CONSISTENCY_HOURS - 1))
+
+        speed_score = np.where(
+            avg_speed < IDEAL_SPEED_LOW,
+            avg_speed / IDEAL_SPEED_LOW,
+            np.where(
+                avg_speed > IDEAL_SPEED_HIGH,
+                1 - (avg_speed - IDEAL_SPEED_HIGH) / IDEAL_SPEED_HIGH,
+                1.0
+            )
+        )
+
+        score = (
+            speed_score * SPEED_WEIGHT +
+            evidence * speed_consistency * SPEED_CONSISTENCY_WEIGHT +
+            evidence * direction_consistency * DIRECTION_CONSISTENCY_WEIGHT
+        )
+        scores[..., i, :n_windows] = np.where(avg_speed >= min_speed, score, -np.inf)
+
+    return scores
+
+def top_k_windows(wind_speed, wind_direction, window_sizes: Sequence[int] = (3,), k: int = 1,
+                  min_speed: float = 0.0) -> List[KiteWindow]:
+    """
+    Find the best scoring windows of a single forecast.
+
+    :param wind_speed: Hourly wind speeds
+    :param wind_direction: Hourly wind directions in degrees
+    :param window_sizes: Window lengths in hours to consider
+    :param k: Number of windows to return
+    :param min_speed: Skip windows with a lower average wind speed
+    :return: Up to k windows, best first
+    """
+    scores = score_windows(wind_speed, wind_direction, window_sizes, min_speed)
+    flat = scores.ravel()
+    k = min(k, int(np.isfinite(flat).sum()))
+    if k <= 0:
+        return []
+
+    best = np.argpartition(-flat, k - 1)[:k]
+    best = best[np.argsort(-flat[best], kind="stable")]
+    hours = scores.shape[-1]
+    return [
+        KiteWindow(start_index=int(index % hours), window_size=window_sizes[index // hours], score=float(flat[index]))
+        for index in best
+    ]
+
+def best_windows(wind_speed, wind_direction, window_sizes: Sequence[int] = (3,),
+                 min_speed: float = 0.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the best window of every forecast in a (spots x hours) matrix.
+
+    :param wind_speed: Wind speeds of shape (spots, hours)
+    :param wind_direction: Wind directions in degrees of shape (spots, hours)
+    :param window_sizes: Window lengths in hours to consider
+    :param min_speed: Skip windows with a lower average wind speed
+    :return: Tuple of (start_index, window_size, score) arrays, one entry per spot
+    """
+    scores = score_windows(wind_speed, wind_direction, window_sizes, min_speed)
+    spots, _, hours = scores.shape
+    flat = scores.reshape(spots, -1)
+    best = np.argmax(flat, axis=1)
+    sizes = np.asarray(window_sizes)[best // hours]
+    return best % hours, sizes, flat[np.arange(spots), best]
+
 def calculate_golden_kitewindow(forecast: List[Dict], window_size: int = 3) -> Tuple[str, str, float]:
     """
     Calculate the best kitesurfing window based on wind conditions.
-    
+
     :param forecast: List of hourly forecast dictionaries
     :param window_size: Size of the window in hours
     :return: Tuple of (start_time, end_time, score)
     """
-    scores = []
-    for i in range(len(forecast) - window_size + 1):
-        window = forecast[i:i+window_size]
-        score = calculate_window_score(window)
-        scores.append((i, score))
-    
-    best_window = max(scores, key=lambda x: x[1])
-    start_index = best_window[0]
-    
-    start_time = forecast[start_index]['time']
-    end_time = forecast[start_index + window_size - 1]['time']
-    
-    return start_time, end_time, best_window[1]
+    wind_speeds = [hour['windSpeed'] for hour in forecast]
+    wind_directions = [hour['windDirection'] for hour in forecast]
+    best_window = top_k_windows(wind_speeds, wind_directions, (window_size,), k=1)[0]
+
+    start_time = forecast[best_window.start_index]['time']
+    end_time = forecast[best_window.end_index]['time']
+
+    return start_time, end_time, best_window.score
 
 def calculate_window_score(window: List[Dict]) -> float:
     """
     Calculate a score for a given time window based on kitesurfing conditions.
-    
+
     :param window: List of hourly forecast dictionaries for the time window
     :return: Score for the window
     """
     wind_speeds = [hour['windSpeed'] for hour in window]
     wind_directions = [hour['windDirection'] for hour in window]
-    
-    avg_speed = np.mean(wind_speeds)
-    speed_consistency = 1 - np.std(wind_speeds) / avg_speed
-    direction_consistency = 1 - np.std(wind_directions) / 180
-    
-    # Adjust these weights based on importance
-    speed_weight = 0.5
-    speed_consistency_weight = 0.3
-    direction_consistency_weight = 0.2
-    
-    # Ideal wind speed range (adjust as needed)
-    ideal_speed_low = 15
-    ideal_speed_high = 25
-    
-    # Calculate speed score
-    if avg_speed < ideal_speed_low:
-        speed_score = avg_speed / ideal_speed_low
-    elif avg_speed > ideal_speed_high:
-        speed_score = 1 - (avg_speed - ideal_speed_high) / ideal_speed_high
-    else:
-        speed_score = 1
-    
-    # Calculate final score
-    score = (
-        speed_score * speed_weight +
-        speed_consistency * speed_consistency_weight +
-        direction_consistency * direction_consistency_weight
-    )
-    
-    return score
+    return float(score_windows(wind_speeds, wind_directions, (len(window),))[0, 0])
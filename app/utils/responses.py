@@ -0,0 +1,69 @@
+import json
+import math
+from typing import Any, Optional
+import numpy as np
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+def _default(value: Any):
+    if isinstance(value, BaseModel):
+        # The same keys FastAPI would send for the model
+        return value.dict(by_alias=True)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _finite(value: Any):
+    """Replace NaN and infinity with None, all the way down."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    if isinstance(value, (BaseModel, np.generic, np.ndarray)):
+        return _finite(_default(value))
+    return value
+
+def _stdlib_dumps(value: Any) -> bytes:
+    return json.dumps(value, default=_default, separators=(",", ":"), ensure_ascii=False, allow_nan=False).encode()
+
+def dumps(value: Any) -> bytes:
+    """
+    Encode to compact JSON bytes, with orjson when it is installed.
+
+    NaN and infinity become null either way, as orjson writes them,
+    instead of the invalid JSON tokens the json module would write.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    try:
+        return _stdlib_dumps(value)
+    except ValueError:
+        # Only walk the value when it actually has non-finite floats
+        return _stdlib_dumps(_finite(value))
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that renders with dumps()."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def trusted(content: Any, status_code: int = 200, headers: Optional[dict] = None) -> FastJSONResponse:
+    """
+    Send data we built ourselves without validating it against the route's
+    response_model again.
+
+    FastAPI passes Response objects through untouched, so the route keeps
+    its response_model for the OpenAPI schema while skipping the per-item
+    validation and jsonable_encoder pass. Only use this for content that
+    already has the documented shape.
+    """
+    return FastJSONResponse(content=content, status_code=status_code, headers=headers)
@@ -0,0 +1,58 @@
+import time
+import logging
+from contextlib import contextmanager
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Imported first thing in main.py, so this is close to process start
+PROCESS_STARTED = time.perf_counter()
+
+
+class StartupReport:
+    """Records how long each component took to import, initialize and warm up."""
+
+    def __init__(self):
+        self.entries: List[dict] = []
+        self.ready_after: Optional[float] = None
+
+    def record(self, component: str, phase: str, seconds: float, error: Optional[str] = None):
+        entry = {
+            "component": component,
+            "phase": phase,
+            "ms": round(seconds * 1000, 1),
+            "at_ms": round((time.perf_counter() - PROCESS_STARTED) * 1000, 1),
+        }
+        if error:
+            entry["error"] = error
+        self.entries.append(entry)
+        logger.info(f"Startup: {component} {phase} took {entry['ms']}ms")
+
+    @contextmanager
+    def measure(self, component: str, phase: str = "init"):
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.record(component, phase, time.perf_counter() - started, error=str(e))
+            raise
+        self.record(component, phase, time.perf_counter() - started)
+
+    def mark_ready(self):
+        """The server is about to accept requests."""
+        self.ready_after = time.perf_counter() - PROCESS_STARTED
+        logger.info(f"Startup: ready to serve after {round(self.ready_after * 1000, 1)}ms")
+
+    def report(self) -> dict:
+        return {
+            "ready_after_ms": round(self.ready_after * 1000, 1) if self.ready_after is not None else None,
+            "components": self.entries,
+        }
+
+
+# Create a global startup report
+startup_report = StartupReport()
+
+# Function to get the startup report
+def get_startup_report() -> StartupReport:
+    return startup_report
@@ -1,12 +1,78 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from app.routers import kitespots, weather
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from app.utils.startup_report import get_startup_report
+
+startup_report = get_startup_report()
+
+with startup_report.measure("fastapi", "import"):
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+with startup_report.measure("routers", "import"):
+    from app.routers import kitespots, weather
+    from app.models import kitespots as spots
+from app.services.kitespot_repository import get_kitespot_repository
+from app.services.suggestion_index import get_suggestion_index, SUGGESTION_BACKEND
+from app.services.spatial_index import get_spatial_index
+from app.services.catalogue_snapshot import get_catalogue_snapshot
+from app.services.kitespot_service import get_kitespot_service
+from app.services.weather_service import get_weather_service
+from app.services.forecast_prefetcher import get_forecast_prefetcher, PREFETCH_ENABLED
+from app.utils.http_session import create_client_session
+from app.utils.responses import FastJSONResponse
 from app.config import get_settings, Settings
 
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled HTTP session for every upstream weather provider
+    http_session = create_client_session()
+    get_weather_service().set_session(http_session)
+
+    # Build the autocomplete index before serving requests
+    if SUGGESTION_BACKEND == "memory":
+        try:
+            with startup_report.measure("suggestion_index"):
+                await get_suggestion_index().refresh(force=True)
+        except Exception as e:
+            logger.error(f"Failed to build suggestion index: {str(e)}")
+    try:
+        with startup_report.measure("spatial_index"):
+            await get_spatial_index().refresh(force=True)
+    except Exception as e:
+        logger.error(f"Failed to build spatial index: {str(e)}")
+    try:
+        with startup_report.measure("catalogue_snapshot"):
+            await get_catalogue_snapshot().refresh(force=True)
+    except Exception as e:
+        logger.error(f"Failed to build catalogue snapshot: {str(e)}")
+    try:
+        with startup_report.measure("kitespot_service"):
+            await get_kitespot_service().refresh(force=True)
+    except Exception as e:
+        logger.error(f"Failed to build kitespot catalogue index: {str(e)}")
+
+    # Load and warm up the model backend once the server is answering health checks
+    warmup = asyncio.create_task(get_weather_service().warmup())
+
+    # Keep forecasts for every spot warm in the background
+    if PREFETCH_ENABLED:
+        get_forecast_prefetcher().start()
+    startup_report.mark_ready()
+    yield
+    warmup.cancel()
+    await get_forecast_prefetcher().stop()
+    # Release pooled connections on shutdown
+    await http_session.close()
+    get_kitespot_repository().close()
+
 app = FastAPI(
     title="Kite API",
     description="API for kitesurfing spots and weather information",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Configure CORS
@@ -25,6 +91,7 @@ app.add_middleware(
 # Include routers
 app.include_router(kitespots.router)
 app.include_router(weather.router)
+app.include_router(spots.router)
 
 @app.get("/")
 async def read_root(settings: Settings = get_settings()):
@@ -34,6 +101,11 @@ async def read_root(settings: Settings = get_settings()):
         "status": "running"
     }
 
+@app.get("/startup-report")
+async def get_startup_timings():
+    """Get how long each component took to import, initialize and warm up."""
+    return startup_report.report()
+
 # Example of using an API key in an endpoint
 @app.get("/weather/{location}")
 async def get_weather(location: str, settings: Settings = get_settings()):
@@ -0,0 +1,93 @@
+"""
+Compare the CPU time FastAPI's default response path spends on our largest
+payloads with the trusted FastJSONResponse path.
+
+The default path validates the payload against the route's response_model,
+runs jsonable_encoder and renders with the standard json module. The fast
+path renders the already-shaped payload directly.
+
+Run from the repository root: python -m scripts.benchmark_responses
+"""
+import time
+import asyncio
+from datetime import datetime
+from typing import List
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.models import kitespots as routes
+from app.models.kitespot import KiteSpot as CatalogueKiteSpot
+from app.services.kitespot_repository import get_kitespot_repository
+from app.services.catalogue_snapshot import get_catalogue_snapshot
+from app.services.kitespot_service import get_kitespot_service
+from app.utils.forecast_generator import MAX_FORECAST_DAYS, generate_forecast
+from app.utils.responses import FastJSONResponse
+
+ROUNDS = 20
+
+async def build_payloads() -> dict:
+    """Representative payloads for each endpoint, keyed by name, with their response models."""
+    repository = get_kitespot_repository()
+    rows = await repository.list_all_spots()
+    snapshot = await get_catalogue_snapshot().get()
+
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    forecast = generate_forecast(rows[0]['id'], now, MAX_FORECAST_DAYS * 24)
+    times = [time.isoformat() for time in forecast.times.astype(datetime)]
+    forecast_rows = routes._forecast_rows(forecast, times, routes._golden_window(forecast, times))
+
+    suggestions = [
+        {"id": row['id'], "name": row['name'], "location": row['location'], "country": row['country']}
+        for row in rows
+    ]
+    nearby = [
+        {
+            "id": row['id'],
+            "name": row['name'],
+            "location": row['location'],
+            "country": row['country'],
+            "latitude": row['latitude'],
+            "longitude": row['longitude'],
+            "distance_km": 0.0
+        }
+        for row in rows if row['latitude'] is not None and row['longitude'] is not None
+    ]
+
+    return {
+        "GET /api/spots?limit=1000": (List[routes.KiteSpot], snapshot.spots[:1000]),
+        "GET /api/kitespot-suggestions (all rows)": (List[routes.KitespotSuggestion], suggestions),
+        "GET /api/spots/nearby (all rows)": (List[routes.NearbySpot], nearby),
+        "GET /api/spots/{id}/forecast?days=16": (routes.SpotForecastResponse, forecast_rows),
+        "GET /api/kitespots/": (List[CatalogueKiteSpot], await get_kitespot_service().get_all_spots()),
+    }
+
+async def cpu_time(fn) -> float:
+    """Mean CPU seconds per call of an async function over ROUNDS calls."""
+    await fn()
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        await fn()
+    return (time.process_time() - start) / ROUNDS
+
+async def main():
+    payloads = await build_payloads()
+    print(f"{'endpoint':45} {'default ms':>11} {'fast ms':>9} {'speedup':>8} {'bytes':>9}")
+    for name, (model, payload) in payloads.items():
+        field = create_response_field(name="response", type_=model)
+
+        async def default():
+            content = await serialize_response(field=field, response_content=payload, is_coroutine=True)
+            return JSONResponse(content).body
+
+        async def fast():
+            return FastJSONResponse(payload).body
+
+        default_time = await cpu_time(default)
+        fast_time = await cpu_time(fast)
+        print(
+            f"{name:45} {default_time * 1000:11.2f} {fast_time * 1000:9.2f} "
+            f"{default_time / fast_time:7.1f}x {len(await fast()):9}"
+        )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -10,6 +10,9 @@ os.makedirs('data', exist_ok=True)
 conn = sqlite3.connect('data/kitespots.db')
 cursor = conn.cursor()
 
+# Use WAL so the API's read-only connections are not blocked while importing
+cursor.execute('PRAGMA journal_mode=WAL')
+
 # Create table for kitespots
 cursor.execute('''
 CREATE TABLE IF NOT EXISTS kitespots (
@@ -28,6 +31,27 @@ CREATE TABLE IF NOT EXISTS kitespots (
 # Create index for faster text search
 cursor.execute('CREATE INDEX IF NOT EXISTS idx_kitespots_search ON kitespots(search_text)')
 
+# Indexes for the filtered, keyset-paginated /api/spots listing. Filters match
+# case-insensitively and pages are walked in id order.
+cursor.execute('CREATE INDEX IF NOT EXISTS idx_kitespots_country ON kitespots(country COLLATE NOCASE, id)')
+cursor.execute('CREATE INDEX IF NOT EXISTS idx_kitespots_difficulty ON kitespots(difficulty COLLATE NOCASE, id)')
+cursor.execute('CREATE INDEX IF NOT EXISTS idx_kitespots_water_type ON kitespots(water_type COLLATE NOCASE, id)')
+cursor.execute('CREATE INDEX IF NOT EXISTS idx_kitespots_lat_lon ON kitespots(latitude, longitude)')
+
+# Full-text index used by the autocomplete endpoint. It reads its content from
+# the kitespots table and keeps prefix indexes so short queries stay cheap.
+cursor.execute('''
+CREATE VIRTUAL TABLE IF NOT EXISTS kitespots_fts USING fts5(
+    name,
+    location,
+    country,
+    content='kitespots',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='1 2 3'
+)
+''')
+
 # Path to your CSV file - update this to your actual path
 csv_path = Path('data/kitespots.csv')
 
@@ -85,8 +109,13 @@ with open(csv_path, 'r', encoding='utf-8') as f:
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             ''', (name, location, country, latitude, longitude, difficulty, water_type, search_text))
 
+# Rebuild the full-text index from the freshly imported rows
+cursor.execute("INSERT INTO kitespots_fts(kitespots_fts) VALUES('rebuild')")
+cursor.execute("INSERT INTO kitespots_fts(kitespots_fts) VALUES('optimize')")
+
 # Commit changes and close connection
 conn.commit()
-print(f"Successfully imported kitespots into database. Total records: {cursor.lastrowid}")
+cursor.execute('SELECT COUNT(*) FROM kitespots')
+print(f"Successfully imported kitespots into database. Total records: {cursor.fetchone()[0]}")
 conn.close()
 